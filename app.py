@@ -9,6 +9,19 @@ import platform
 
 # Auth check before heavy imports
 from auth import check_license, validate_key, get_license_info
+from log import get_logger
+from metrics import metrics
+
+log = get_logger("app")
+
+# Startup timing reference (time-to-first-window / time-to-first-result)
+APP_START = time.perf_counter()
+
+# First and longest wait before retrying a failed OCR model load (s)
+READER_RETRY = (5.0, 300.0)
+
+# Longest wait for frames in flight before unloading the OCR model (s)
+PIPELINE_DRAIN_TIMEOUT = 5.0
 
 
 # ============ UI STYLING ============
@@ -41,7 +54,7 @@ def set_dark_titlebar(window):
         window.withdraw()
         window.deiconify()
     except Exception as e:
-        print(f"[ui] Could not set dark titlebar: {e}")
+        log.warning("Could not set dark titlebar: %s", e)
 
 
 # Colors
@@ -315,6 +328,43 @@ class ForgerCompanion:
         self.enhancement_level = 0
         self.last_result = None
         
+        # One capture source shared by the detect and scan loops
+        # (the live screen unless the settings point at a replay)
+        from capture import create_source
+        from config import get_capture_settings
+        self.capture_session = create_source(get_capture_settings())
+        
+        # Follows the forge UI around the screen when the game window moves
+        self.locator = None
+        if get_capture_settings().get("auto_locate", True):
+            from locator import ForgeLocator
+            self.locator = ForgeLocator()
+            self.locator.load()
+        
+        # Capture and OCR sleep while the game is minimized or in the background
+        from window_state import create_window_state, VISIBLE
+        self.window_state = create_window_state(get_capture_settings())
+        self.game_state = VISIBLE
+        
+        # Unloads the OCR model while the forge stays closed
+        from config import get_ocr_settings
+        from memory import ReaderMemoryManager
+        ocr_settings = get_ocr_settings()
+        self.memory = ReaderMemoryManager(ocr_settings.get("unload_after", 300),
+                                          ocr_settings.get("memory_budget_mb", 0))
+        self.model_unloaded = False
+        
+        # Scan timing follows latency, frame changes and UI state
+        from scheduler import AdaptiveScheduler
+        self.scheduler = AdaptiveScheduler(self.settings.get("preferences", {}).get("scan_interval", 2.0))
+        self.auto_thread = None
+        
+        # Frames flow capture -> recognize -> match -> calculate on their own threads
+        from pipeline import create_scan_pipeline
+        self.scan_pipeline = create_scan_pipeline(self.on_scan_complete, calculate_forge, self.on_scan_error)
+        self.analysis_seq = 0  # newest frame applied to the UI state
+        self.results_seq = 0   # newest frame shown in the results
+        
         self.setup_ui()
         
         # Center window on screen
@@ -322,6 +372,12 @@ class ForgerCompanion:
         x = (self.root.winfo_screenwidth() - 420) // 2
         y = (self.root.winfo_screenheight() - 550) // 2
         self.root.geometry(f"+{x}+{y}")
+        self.first_result_reported = False
+        self.root.after(0, lambda: log.info("First window in %.2fs", time.perf_counter() - APP_START))
+        
+        # Build the OCR model in the background - scans wait until it's ready
+        self.reader_retry_delay = READER_RETRY[0]
+        self.load_ocr_model()
         
         # Show tutorial on first run
         if not self.settings.get("setup_complete"):
@@ -703,37 +759,273 @@ class ForgerCompanion:
         
         # Debug (hidden by default)
         self.debug_frame = tk.Frame(self.root, bg=self.bg_color)
-        self.debug_text = tk.Text(self.debug_frame, height=2, bg="#111", fg="#666", font=("Consolas", 8), wrap=tk.WORD)
+        self.debug_text = tk.Text(self.debug_frame, height=3, bg="#111", fg="#666", font=("Consolas", 8), wrap=tk.WORD)
         self.debug_text.pack(fill=tk.X, padx=5)
+        debug_buttons = tk.Frame(self.debug_frame, bg=self.bg_color)
+        debug_buttons.pack(anchor=tk.E, padx=5, pady=(2, 0))
+        StyledButton(debug_buttons, text="Dump metrics", command=self.dump_metrics,
+                     width=90, height=20, font=("Arial", 8)).pack(side=tk.RIGHT)
+        self.profile_btn = StyledButton(debug_buttons, text="Profile", command=self.start_profile,
+                                        width=70, height=20, font=("Arial", 8))
+        self.profile_btn.pack(side=tk.RIGHT, padx=(0, 4))
+        self.profiler = None
         self.debug_visible = False
         
         # Right-click to toggle debug
         self.root.bind("<Button-3>", lambda e: self.toggle_debug())
     
+    def load_ocr_model(self):
+        """Build the OCR model in the background (any thread); retried if it fails"""
+        from ocr_scanner import load_reader_async
+        self.root.after(0, lambda: self.status_label.config(text="Loading OCR model..."))
+        load_reader_async(on_ready=lambda: self.root.after(0, self.on_reader_ready),
+                          on_error=lambda error: self.root.after(0, lambda: self.on_reader_error(error)))
+    
+    def on_reader_error(self, error):
+        """Called in the main thread when the OCR model failed to load: show why, retry later"""
+        delay = self.reader_retry_delay
+        self.reader_retry_delay = min(delay * 2, READER_RETRY[1])
+        log.warning("Retrying the OCR model load in %.0fs", delay)
+        if len(error) > 60:
+            error = error[:57] + "..."
+        self.status_label.config(text=f"OCR model failed: {error} - retrying in {delay:.0f}s")
+        self.root.after(int(delay * 1000), self.load_ocr_model)
+    
+    def on_reader_ready(self):
+        """Called in the main thread once the OCR model has loaded"""
+        from ocr_scanner import reader_load_time
+        self.reader_retry_delay = READER_RETRY[0]
+        log.info("OCR model ready at %.2fs (load %.2fs)", time.perf_counter() - APP_START, reader_load_time)
+        if not self.forge_ui_visible:
+            self.status_label.config(text="Waiting for Forge UI..." if self.auto_mode else "Auto mode: OFF")
+    
+    def report_first_result(self):
+        if not self.first_result_reported:
+            self.first_result_reported = True
+            log.info("First OCR result in %.2fs", time.perf_counter() - APP_START)
+    
     def start_auto_detect(self):
-        """Start background thread for auto-detecting forge UI"""
+        """Start background thread for auto-detecting forge UI and scanning ores.
+        
+        Each tick captures the forge slots once and hands the frame to the
+        scan pipeline; its analysis drives both the UI-state handling and the
+        ore results. The scheduler picks the delay to the next tick, and the
+        pipeline drops frames that a newer capture has superseded, so scans
+        never pile up.
+        """
+        if self.auto_thread and self.auto_thread.is_alive():
+            self.scheduler.wake()  # loop still running - just scan now
+            return
         self.waiting_for_ores = False
         
         def auto_detect_loop():
+            from ocr_scanner import reader_ready, capture_screen, get_reader_memory
+            from capture import EndOfSource
+            from scheduler import CHEAP_INTERVAL
+            from window_state import VISIBLE
+            self.scan_pipeline.start()
             while self.auto_mode:
+                state = self.window_state.state()
+                if state != VISIBLE:
+                    self.on_game_state(state)
+                    if not self.window_state.wait_visible(1.0):
+                        continue  # re-check auto_mode (and the state) now and then
+                if self.game_state != VISIBLE:
+                    self.on_game_state(VISIBLE)
+                
+                if self.model_unloaded and not reader_ready.is_set():
+                    # Model unloaded while idle: watch for the forge without OCR
+                    try:
+                        self.watch_for_forge()
+                    except EndOfSource:
+                        log.info("Replay finished")
+                        break
+                    except Exception as e:
+                        self.on_scan_error("capture", None, e)
+                    self.scheduler.wait(CHEAP_INTERVAL)
+                    continue
+                self.model_unloaded = False
+                
+                # Hold detection requests until the OCR model is loaded
+                if not reader_ready.wait(0.5):
+                    continue
                 try:
-                    from ocr_scanner import detect_forge_ui
-                    is_forge, has_ores, _ = detect_forge_ui(self.scan_region)
-                    
-                    # Update UI in main thread
-                    self.root.after(0, lambda f=is_forge, o=has_ores: self.on_forge_ui_detected(f, o))
-                    
+                    # Stamped before the grab so end_to_end includes the capture
+                    captured_at = time.perf_counter()
+                    # Copy: the session reuses its buffer on the next grab
+                    frame = capture_screen(self.scan_region, self.capture_session).copy()
+                    if (self.locator and not self.locator.confirm(frame, self.scan_region)
+                            and self.locator.search_due() and self.relocate_forge_ui()):
+                        captured_at = time.perf_counter()
+                        frame = capture_screen(self.scan_region, self.capture_session).copy()
+                    total_mb = get_reader_memory()["total_mb"] if self.memory.memory_budget_mb else None
+                    if self.memory.should_unload(total_mb) and self.unload_model(frame):
+                        continue
+                    self.scan_pipeline.submit({"frame": frame, "region": self.scan_region,
+                                               "region_name": "forge_slots",
+                                               "captured_at": captured_at})
+                except EndOfSource:
+                    log.info("Replay finished")
+                    break
                 except Exception as e:
-                    print(f"[auto] Detection error: {e}")
+                    self.on_scan_error("capture", None, e)
                 
-                # Faster polling when waiting for ores, slower otherwise
-                sleep_time = 1.0 if self.waiting_for_ores else 2.0
-                time.sleep(sleep_time)
+                self.scheduler.wait()
         
-        threading.Thread(target=auto_detect_loop, daemon=True).start()
+        self.auto_thread = threading.Thread(target=auto_detect_loop, daemon=True)
+        self.auto_thread.start()
+    
+    def on_game_state(self, state):
+        """Capture thread: note the game window's state (only acts on changes)"""
+        from window_state import VISIBLE, MISSING
+        if state == self.game_state:
+            return
+        self.game_state = state
+        if state == VISIBLE:
+            log.info("Game visible again - resuming scans")
+            text = "Waiting for Forge UI..."
+        elif state == MISSING:
+            log.warning("No Roblox window found - pausing capture and OCR "
+                        "(set \"pause_when_hidden\": false to scan anyway)")
+            text = "Paused - Roblox window not found (see pause_when_hidden)"
+        else:
+            log.info("Game %s - pausing capture and OCR", state)
+            text = "Paused - Roblox not in focus"
+        self.root.after(0, lambda: self.status_label.config(text=text))
+    
+    def forge_seen_without_ocr(self, frame):
+        """Pixel UI detector / locator verdict on a capture of the scan region.
+        
+        Returns:
+            bool or None: None when neither is trained for the region
+        """
+        from ocr_scanner import check_forge_ui
+        verdict = check_forge_ui(frame, self.scan_region)
+        if verdict:
+            return True
+        if self.locator and self.locator.has_template() and self.locator.rect == self.scan_region:
+            return self.locator.confirm(frame, self.scan_region)
+        return verdict
+    
+    def unload_model(self, frame):
+        """Capture thread: drop the idle OCR model, if the forge can still be noticed without it.
+        
+        Returns:
+            bool: True if the model was unloaded
+        """
+        from ocr_scanner import unload_reader
+        seen = self.forge_seen_without_ocr(frame)
+        if seen is None:
+            return False  # nothing could tell us when to load it again
+        if seen:
+            self.memory.note_forge(True)  # back on the forge: it's not idle
+            return False
+        # Let frames already in the pipeline finish their OCR first (this thread
+        # is the only one submitting, so nothing new arrives meanwhile)
+        last_forge = self.memory.last_forge
+        if not self.scan_pipeline.drain(PIPELINE_DRAIN_TIMEOUT):
+            return False
+        if self.memory.last_forge != last_forge:
+            return False  # one of them saw the forge
+        if not unload_reader():
+            return False
+        self.model_unloaded = True
+        self.memory.record_unload()
+        log.info("OCR model unloaded after %.0fs without the forge UI", self.memory.idle_time())
+        self.root.after(0, lambda: self.status_label.config(text="Waiting for Forge UI... (OCR model unloaded)"))
+        return True
+    
+    def watch_for_forge(self):
+        """Capture thread, model unloaded: reload it once the forge UI shows up again"""
+        from ocr_scanner import capture_screen
+        frame = capture_screen(self.scan_region, self.capture_session)
+        seen = self.forge_seen_without_ocr(frame)
+        if not seen and self.locator and self.locator.search_due():
+            seen = self.relocate_forge_ui()  # the game window may have moved meanwhile
+        if not seen:
+            return
+        self.model_unloaded = False
+        self.memory.record_reload()
+        log.info("Forge UI seen - reloading the OCR model")
+        self.load_ocr_model()
+    
+    def relocate_forge_ui(self):
+        """Capture thread: search the monitor for the forge UI and move the regions to it.
+        
+        Returns:
+            bool: True if the regions moved
+        """
+        from config import set_regions, load_settings
+        from locator import move_region
+        screen = self.capture_session.grab(None)
+        start = time.perf_counter()
+        region, score = self.locator.search(screen, getattr(self.capture_session, "origin", (0, 0)))
+        elapsed = (time.perf_counter() - start) * 1000
+        old = self.locator.rect
+        if region is None or all(abs(region[k] - old[k]) <= 2 for k in region):
+            log.info("Forge UI not found elsewhere (best %.2f, %.0f ms)", score, elapsed)
+            return False
+        
+        dx, dy, scale = self.locator.relocate(region)
+        regions = {"forge_slots": region}
+        for name in ("ores_panel", "forge_button"):
+            moved = move_region(self.settings.get("regions", {}).get(name), old, dx, dy, scale)
+            if moved:
+                regions[name] = moved
+        set_regions(regions)
+        self.settings = load_settings()
+        self.scan_region = region
+        self.ores_region = regions.get("ores_panel", self.ores_region)
+        log.info("Forge UI moved to %s (score %.2f, %.0f ms)", region, score, elapsed)
+        return True
+    
+    def on_scan_complete(self, packet):
+        """Pipeline sink (pipeline thread): pace the scheduler, then update the UI"""
+        from scheduler import CLOSED, WAITING, SCANNING
+        analysis = packet["analysis"]
+        if (self.locator and analysis["is_forge_ui"] and analysis["ocr_ran"] and packet["region"]
+                and self.locator.needs_learning(packet["region"])):
+            self.locator.learn(packet["frame"], packet["region"])
+        if not analysis["is_forge_ui"]:
+            state = CLOSED
+        else:
+            state = SCANNING if analysis["has_ores"] else WAITING
+        self.scheduler.record(state, analysis["frame_changed"], time.perf_counter() - packet["captured_at"],
+                              analysis["ocr_ran"])
+        
+        # Update UI in main thread
+        metrics.count("scans")
+        self.root.after(0, lambda p=packet: self.on_frame_analyzed(p["analysis"], p["seq"], p["forge"],
+                                                                   p["captured_at"]))
+    
+    def on_scan_error(self, stage, packet, error):
+        log.error("Detection error (%s): %s", stage, error)
+        if self.scanning:
+            self.root.after(0, lambda err=str(error): self.status_label.config(text=f"Error: {err}"))
+    
+    def on_frame_analyzed(self, analysis, seq=None, forge=None, captured_at=None):
+        """Feed one frame analysis to both the UI-state and ore-results consumers.
+        
+        seq is the frame sequence number; analyses older than the last applied
+        one are ignored. forge holds precomputed calculate_forge results;
+        captured_at (perf_counter) times the whole capture-to-overlay path.
+        """
+        if seq is not None:
+            if seq <= self.analysis_seq:
+                return
+            self.analysis_seq = seq
+        self.on_forge_ui_detected(analysis["is_forge_ui"], analysis["has_ores"])
+        if self.scanning:
+            self.detected_ores = analysis["detected"]
+            with metrics.span("tk_update"):
+                self.update_results(analysis["detected"], analysis["raw_text"], seq, forge)
+        if captured_at is not None:
+            metrics.record("end_to_end", time.perf_counter() - captured_at)
     
     def on_forge_ui_detected(self, visible, has_ores):
         """Called when forge UI detection state changes"""
+        self.report_first_result()
+        self.memory.note_forge(visible)
         prev_visible = self.forge_ui_visible
         self.forge_ui_visible = visible
         
@@ -747,9 +1039,7 @@ class ForgerCompanion:
                 self.waiting_for_ores = False
                 self.auto_indicator.config(fg=FG_GREEN)
                 self.status_label.config(text="Scanning ores...")
-                if not self.scanning:
-                    self.scanning = True
-                    threading.Thread(target=self.scan_loop, daemon=True).start()
+                self.scanning = True
             else:
                 # Forge UI open but no ores yet - waiting
                 self.waiting_for_ores = True
@@ -777,32 +1067,53 @@ class ForgerCompanion:
             self.auto_btn.config(bg="#333")
             self.auto_indicator.config(fg="#666")
             self.status_label.config(text="Auto mode: OFF")
+            self.scheduler.wake()  # let the loop see auto_mode and exit
+        
+    def update_results(self, detected, raw_text, seq=None, forge=None):
+        # Never replace a newer scan with an older one
+        if seq is not None:
+            if seq < self.results_seq:
+                return
+            self.results_seq = seq
         
-    def scan_loop(self):
-        while self.scanning:
-            try:
-                detected, raw_text = scan_for_ores(self.scan_region)
-                self.detected_ores = detected
-                
-                # Update UI in main thread
-                self.root.after(0, lambda d=detected, r=raw_text: self.update_results(d, r))
-                
-            except Exception as e:
-                self.root.after(0, lambda err=str(e): self.status_label.config(text=f"Error: {err}"))
-            
-            time.sleep(2)  # Scan every 2 seconds
-    
-    def update_results(self, detected, raw_text):
         # Update debug
+        from ocr_scanner import (get_gate_stats, get_layout_stats, get_template_stats, get_tile_stats,
+                                 get_ui_detector_stats, get_reader_memory)
+        gate = get_gate_stats()
+        layout = get_layout_stats()
+        tmpl = get_template_stats()
+        tiles = get_tile_stats()
+        ui = get_ui_detector_stats()
+        sched = self.scheduler.stats()
+        loc = self.locator.stats() if self.locator else None
+        mem = get_reader_memory()
+        mem_text = " / ".join(f"{name} {mem[key]:.0f} MB" for name, key in (("rss", "rss_mb"), ("model", "model_mb"))
+                              if mem[key] is not None)
+        dropped = sum(stage["dropped"] for stage in self.scan_pipeline.stats().values())
         self.debug_text.delete(1.0, tk.END)
+        self.debug_text.insert(tk.END, f"[gate] skipped {gate['hits']} / ocr {gate['misses']} "
+                                       f"({gate['hit_rate']:.0%} reused) | "
+                                       f"[layout] detect {layout['detections']} / reuse {layout['reuses']} | "
+                                       f"[templates] {tmpl['templates']} ({tmpl['hit_rate']:.0%} matched) | "
+                                       f"[tiles] {tiles['size']}/{tiles['capacity']} cached, "
+                                       f"{tiles['hit_rate']:.0%} hit, {tiles['evictions']} evicted | "
+                                       f"[sched] next {sched['delay']:.2f}s, scan {sched['latency'] * 1000:.0f} ms | "
+                                       f"[pipeline] {dropped} stale frames dropped | "
+                                       f"[ui] {ui['skips']} ocr skipped, {ui['avg_us']:.0f} us/check"
+                                       + (f" | [locator] {loc['searches']} searches, {loc['relocations']} moves"
+                                          if loc else "") + "\n")
+        self.debug_text.insert(tk.END, f"[mem] {mem_text}, unloaded {self.memory.unloads}x | "
+                                       f"[ms p50/p95/p99] {metrics.summary()}\n")
         self.debug_text.insert(tk.END, raw_text[:500])
         
         # Update status
         self.status_label.config(text=f"Found {len(detected)} ores")
         
-        # Calculate BOTH weapon and armor results
-        weapon_result = calculate_forge(detected, "Weapon")
-        armor_result = calculate_forge(detected, "Armor")
+        # Calculate BOTH weapon and armor results (already done by the scan pipeline)
+        if forge is None:
+            forge = {craft: calculate_forge(detected, craft) for craft in ("Weapon", "Armor")}
+        weapon_result = forge["Weapon"]
+        armor_result = forge["Armor"]
         self.last_result = weapon_result  # Store for enhancement updates
         
         if not weapon_result:
@@ -954,6 +1265,42 @@ class ForgerCompanion:
             stats_text = f"Masterwork {mw_price:,}$  •  {enh_dmg:.2f} DMG{enh_text}"
             self.weapon_stats_label.config(text=stats_text)
     
+    def dump_metrics(self):
+        """Write the latency metrics as JSON and Prometheus text next to the settings"""
+        from config import CONFIG_DIR
+        try:
+            for name in ("metrics.json", "metrics.prom"):
+                metrics.dump(CONFIG_DIR / name)
+        except OSError as e:
+            log.error("Metrics dump failed: %s", e)
+            return
+        log.info("Metrics written to %s", CONFIG_DIR / "metrics.json")
+        self.status_label.config(text="Metrics saved to settings folder")
+    
+    def start_profile(self):
+        """Sample every thread for preferences.profile_seconds and save the profile"""
+        from config import CONFIG_DIR
+        from profiler import SamplingProfiler
+        if self.profiler and self.profiler.is_running():
+            return
+        seconds = self.settings.get("preferences", {}).get("profile_seconds", 10)
+        self.profiler = SamplingProfiler()
+        self.profiler.start(seconds, CONFIG_DIR / "profiles",
+                            on_done=lambda paths: self.root.after(0, lambda: self.on_profile_done(paths)))
+        log.info("Profiling all threads for %ss...", seconds)
+        self.status_label.config(text=f"Profiling for {seconds}s...")
+    
+    def on_profile_done(self, paths):
+        if paths is None:
+            self.status_label.config(text="Profile failed - see log")
+            return
+        folded, summary = paths
+        log.info("Profile written to %s (collapsed stacks: %s)", summary, folded.name)
+        self.status_label.config(text=f"Profile saved: {summary.name}")
+        if self.debug_visible:
+            self.debug_text.delete(1.0, tk.END)
+            self.debug_text.insert(tk.END, summary.read_text(encoding="utf-8"))
+    
     def toggle_debug(self):
         self.debug_visible = not self.debug_visible
         if self.debug_visible:
@@ -978,6 +1325,8 @@ class ForgerCompanion:
         self.settings = load_settings()
         self.scan_region = get_region("forge_slots")
         self.ores_region = get_region("ores_panel")
+        self.scheduler.base_interval = self.settings.get("preferences", {}).get("scan_interval", 2.0)
+        self.scheduler.wake()  # rescan with the new region right away
         self.status_label.config(text="Settings updated")
         self.settings_window = None  # Clear reference
     
@@ -1074,6 +1423,13 @@ class ForgerCompanion:
     
     def run(self):
         self.root.mainloop()
+        self.scanning = False
+        self.auto_mode = False
+        self.scheduler.wake()
+        self.scan_pipeline.stop()
+        self.capture_session.close()
+        from ocr_scanner import shutdown_reader
+        shutdown_reader()
 
 
 class SettingsWindow:
@@ -1506,8 +1862,7 @@ class MacroSettingsWindow:
 def start_app():
     """Start the main application after auth and setup"""
     # Import heavy modules only after auth
-    global scan_for_ores, calculate_forge, ORES, RARITY_COLORS
-    from ocr_scanner import scan_for_ores
+    global calculate_forge, ORES, RARITY_COLORS
     from calculator import calculate_forge
     from data import ORES, RARITY_COLORS
     
@@ -1517,6 +1872,9 @@ def start_app():
 
 def main():
     """Main entry point with auth check"""
+    from config import get_log_settings
+    from log import setup_logging
+    setup_logging(get_log_settings())
     print("Starting Forger Companion...")
     
     # Check for existing valid license
@@ -1536,4 +1894,6 @@ def main():
 
 
 if __name__ == "__main__":
+    import multiprocessing
+    multiprocessing.freeze_support()  # OCR worker process in frozen builds
     main()
@@ -10,6 +10,10 @@ import urllib.error
 from pathlib import Path
 from datetime import datetime
 
+from log import get_logger
+
+log = get_logger("auth")
+
 # API endpoint - update this to your Railway URL
 API_URL = os.environ.get("FORGER_API_URL", "https://forger-production.up.railway.app")
 
@@ -50,7 +54,7 @@ def get_hardware_id() -> str:
                     with open(path) as f:
                         return hashlib.sha256(f.read().strip().encode()).hexdigest()[:32]
     except Exception as e:
-        print(f"[auth] Hardware ID error: {e}")
+        log.warning("Hardware ID error: %s", e)
     
     # Fallback: use hostname + username
     fallback = f"{platform.node()}-{os.getlogin()}"
@@ -64,7 +68,7 @@ def load_config() -> dict:
             with open(CONFIG_FILE) as f:
                 return json.load(f)
     except Exception as e:
-        print(f"[auth] Config load error: {e}")
+        log.error("Config load error: %s", e)
     return {}
 
 
@@ -75,7 +79,7 @@ def save_config(config: dict):
         with open(CONFIG_FILE, "w") as f:
             json.dump(config, f, indent=2)
     except Exception as e:
-        print(f"[auth] Config save error: {e}")
+        log.error("Config save error: %s", e)
 
 
 def api_request(endpoint: str, data: dict) -> dict:
@@ -0,0 +1,463 @@
+"""Benchmarks for the OCR scanner
+
+Usage:
+    python benchmark.py backends frame.png [--runs 10]
+    python benchmark.py patterns [--items 20000]
+    python benchmark.py preprocess corpus_dir [--presets raw,grey,fast,binary]
+    python benchmark.py corpus corpus_dir [--report out.json] [--baseline base.json]
+    python benchmark.py synth [--frames 5000] [--misread 0.05] [--ocr]
+
+A corpus dir holds recorded forge slot frames (PNG) and a labels.json
+mapping each file name to the expected {ore_name: count}.
+"""
+
+import argparse
+import json
+import os
+import random
+import statistics
+import sys
+import time
+sys.path.insert(0, os.path.dirname(__file__))
+
+import numpy as np
+from PIL import Image
+
+
+def load_frame(path):
+    """Load a recorded frame as an RGB uint8 array"""
+    return np.array(Image.open(path).convert("RGB"))
+
+
+def time_calls(func, runs):
+    """Call func `runs` times and return per-call latencies in ms"""
+    times = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        func()
+        times.append((time.perf_counter() - start) * 1000)
+    return times
+
+
+def format_times(times):
+    times = sorted(times)
+    p95 = times[min(len(times) - 1, int(round(0.95 * (len(times) - 1))))]
+    return f"median {statistics.median(times):8.1f} ms | p95 {p95:8.1f} ms | min {times[0]:8.1f} ms"
+
+
+def backend_configs():
+    """All OCR backend configurations worth comparing on this machine"""
+    from ocr_backend import cuda_available, default_thread_count
+
+    thread_counts = sorted({1, 2, default_thread_count(), os.cpu_count() or 1})
+    configs = []
+    for threads in thread_counts:
+        for quantize in (True, False):
+            configs.append({"device": "cpu", "threads": threads, "quantize": quantize})
+    if cuda_available():
+        configs.append({"device": "cuda", "threads": default_thread_count(), "quantize": False})
+    return configs
+
+
+def bench_backends(args):
+    """Per-frame readtext latency for each OCR backend config"""
+    from ocr_backend import create_reader, describe_backend
+
+    frame = load_frame(args.frame)
+    print(f"Frame: {args.frame} ({frame.shape[1]}x{frame.shape[0]}), {args.runs} runs per config\n")
+
+    for backend in backend_configs():
+        load_start = time.perf_counter()
+        reader = create_reader(backend)
+        reader.readtext(frame)  # warm-up
+        load_time = time.perf_counter() - load_start
+
+        times = time_calls(lambda: reader.readtext(frame), args.runs)
+        print(f"{describe_backend(backend):<24} {format_times(times)} | load {load_time:5.1f}s")
+
+
+def match_ore_loop(text_lower, patterns):
+    """Reference implementation: check every pattern in both directions"""
+    best_match = None
+    best_match_len = 0
+    for pattern, ore_id in patterns.items():
+        if pattern in text_lower:
+            if len(pattern) > best_match_len:
+                best_match = ore_id
+                best_match_len = len(pattern)
+        elif text_lower in pattern and len(text_lower) >= 4:
+            if len(text_lower) > best_match_len:
+                best_match = ore_id
+                best_match_len = len(text_lower)
+    return best_match, best_match_len
+
+
+def sample_ocr_texts(patterns, count, seed=0):
+    """OCR-like text items: exact names, partial reads, misreads, counts and noise"""
+    rng = random.Random(seed)
+    names = list(patterns)
+    texts = []
+    for _ in range(count):
+        name = rng.choice(names)
+        kind = rng.random()
+        if kind < 0.3:
+            text = name
+        elif kind < 0.5:
+            start = rng.randint(0, len(name) - 1)
+            text = name[start:rng.randint(start + 1, len(name))]
+        elif kind < 0.7:
+            chars = list(name)
+            chars[rng.randrange(len(chars))] = rng.choice("1lioe")
+            text = "".join(chars)
+        elif kind < 0.85:
+            text = f"x{rng.randint(1, 20)}"
+        else:
+            text = "".join(rng.choice("abcdeilmnorstxy !/") for _ in range(rng.randint(3, 16)))
+        texts.append(text)
+    return texts
+
+
+def bench_patterns(args):
+    """Compiled ore matcher vs. the per-pattern loop"""
+    from ore_matcher import ORE_PATTERNS, ore_matcher, fuzzy_ore_name
+
+    texts = sample_ocr_texts(ORE_PATTERNS, args.items)
+    mismatches = [t for t in texts if ore_matcher.match(t) != match_ore_loop(t, ORE_PATTERNS)]
+
+    start = time.perf_counter()
+    for text in texts:
+        match_ore_loop(text, ORE_PATTERNS)
+    loop_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for text in texts:
+        ore_matcher.match(text)
+    matcher_time = time.perf_counter() - start
+
+    per_item = 1e6 / len(texts)
+    print(f"{len(ORE_PATTERNS)} patterns, {len(texts)} text items")
+    print(f"pattern loop     {loop_time * per_item:7.2f} us/item")
+    print(f"compiled matcher {matcher_time * per_item:7.2f} us/item ({loop_time / matcher_time:.1f}x faster)")
+    print(f"mismatches: {len(mismatches)}" + (f" e.g. {mismatches[:5]}" if mismatches else ""))
+
+    # Fuzzy fallback only runs for items no pattern matched
+    unmatched = [t for t in texts if ore_matcher.match(t)[0] is None]
+    start = time.perf_counter()
+    rescued = sum(1 for t in unmatched if fuzzy_ore_name.__wrapped__(t)[0])
+    fuzzy_time = time.perf_counter() - start
+    if unmatched:
+        print(f"fuzzy fallback   {fuzzy_time * 1e6 / len(unmatched):7.2f} us/item (uncached), "
+              f"rescued {rescued}/{len(unmatched)} unmatched items")
+
+
+def load_corpus(corpus_dir):
+    """Labelled frames as a list of (name, frame, expected {ore: count})"""
+    with open(os.path.join(corpus_dir, "labels.json")) as f:
+        labels = json.load(f)
+    return [(name, load_frame(os.path.join(corpus_dir, name)), expected)
+            for name, expected in sorted(labels.items())]
+
+
+def reset_scan_caches(ocr_scanner):
+    """Forget everything earlier frames taught the scanner, so the next scan runs cold"""
+    ocr_scanner.frame_gate.reset()
+    ocr_scanner.layout_cache.invalidate()
+    ocr_scanner.tile_cache.clear()
+    if ocr_scanner.ui_detector is not None:
+        ocr_scanner.ui_detector.reset()
+
+
+def bench_preprocess(args):
+    """Match rate and read_text latency of each preprocessing preset"""
+    import ocr_scanner
+    from preprocess import PRESETS
+
+    corpus = load_corpus(args.corpus)
+    ocr_scanner.get_reader()
+    ocr_scanner.templates = None  # measure the OCR path alone, don't learn samples
+    presets = args.presets.split(",") if args.presets else list(PRESETS)
+    print(f"Corpus: {args.corpus} ({len(corpus)} frames)\n")
+
+    for preset in presets:
+        times, matched, failures = [], 0, []
+        for name, frame, expected in corpus:
+            # First read learns the text height, the timed one runs at the target scale
+            reset_scan_caches(ocr_scanner)
+            ocr_scanner._text_heights.clear()
+            ocr_scanner.read_text(frame, pipeline=preset)
+            reset_scan_caches(ocr_scanner)
+
+            start = time.perf_counter()
+            results = ocr_scanner.read_text(frame, pipeline=preset)
+            times.append((time.perf_counter() - start) * 1000)
+
+            detected = ocr_scanner.analyze_results(results)["detected"]
+            if {ore: info["count"] for ore, info in detected.items()} == expected:
+                matched += 1
+            else:
+                failures.append(name)
+
+        print(f"{preset:<8} {format_times(times)} | match {matched}/{len(corpus)}"
+              + (f" | failed: {', '.join(failures[:5])}" if failures else ""))
+
+
+# ============ CORPUS BENCHMARK ============
+
+REGRESSION_TOLERANCE = 0.10  # latency/memory may grow this much before it's flagged
+REGRESSION_MIN_MS = 1.0      # ...and by at least this many ms
+
+
+def percentile(values, q):
+    return float(np.percentile(values, q)) if values else 0.0
+
+
+def memory_mb():
+    """Current RSS of this process plus the live OCR worker process, in MB"""
+    import ocr_scanner
+    return ocr_scanner.get_reader_memory()["total_mb"]
+
+
+class StageTimer:
+    """Times calls to named functions by wrapping them on their owner objects"""
+
+    def __init__(self):
+        self.times = {}
+        self._patched = []
+
+    def wrap(self, owner, attr, stage):
+        func = getattr(owner, attr)
+        samples = self.times.setdefault(stage, [])
+
+        def timed(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                samples.append((time.perf_counter() - start) * 1000)
+
+        setattr(owner, attr, timed)
+        self._patched.append((owner, attr, func))
+
+    def restore(self):
+        for owner, attr, func in reversed(self._patched):
+            setattr(owner, attr, func)
+        self._patched.clear()
+
+    def summary(self):
+        return {stage: {"calls": len(t), "p50_ms": percentile(t, 50),
+                        "p95_ms": percentile(t, 95), "mean_ms": float(np.mean(t)) if t else 0.0}
+                for stage, t in self.times.items()}
+
+
+def run_corpus(corpus_dir, warm=False):
+    """Run scan_for_ores over every labelled frame of a corpus.
+
+    Returns:
+        dict: report with per-stage latency, peak memory and accuracy
+    """
+    import ocr_scanner
+    from capture import DirectorySource
+    from config import get_ocr_settings, get_preprocess_pipeline
+
+    with open(os.path.join(corpus_dir, "labels.json")) as f:
+        labels = json.load(f)
+    source = DirectorySource(corpus_dir)
+    reader = ocr_scanner.get_reader()
+    ocr_scanner.templates = None  # measure the OCR path alone, don't learn samples
+
+    timer = StageTimer()
+    timer.wrap(source, "grab", "capture")
+    timer.wrap(ocr_scanner, "preprocess", "preprocess")
+    timer.wrap(reader, "detect", "detect")
+    timer.wrap(reader, "recognize", "recognize")
+    timer.wrap(ocr_scanner, "match_ores", "match")
+    timer.wrap(ocr_scanner, "assign_counts", "assign_counts")
+
+    total, peak_mb, correct, failures = [], memory_mb(), 0, []
+    try:
+        for path in source.files:
+            if not warm:
+                reset_scan_caches(ocr_scanner)
+            start = time.perf_counter()
+            detected, _ = ocr_scanner.scan_for_ores(None, source)
+            total.append((time.perf_counter() - start) * 1000)
+
+            mb = memory_mb()
+            if mb is not None:
+                peak_mb = max(peak_mb or 0.0, mb)
+            expected = labels.get(path.name)
+            if expected is None:
+                continue
+            found = {ore: info["count"] for ore, info in detected.items()}
+            if found == expected:
+                correct += 1
+            else:
+                failures.append({"frame": path.name, "expected": expected, "detected": found})
+    finally:
+        timer.restore()
+        source.close()
+
+    stages = timer.summary()
+    stages["total"] = {"calls": len(total), "p50_ms": percentile(total, 50),
+                       "p95_ms": percentile(total, 95), "mean_ms": float(np.mean(total)) if total else 0.0}
+    labelled = sum(1 for p in source.files if p.name in labels)
+    return {
+        "corpus": os.path.abspath(corpus_dir),
+        "created": time.strftime("%Y-%m-%d %H:%M:%S"),
+        "frames": len(source.files),
+        "labelled": labelled,
+        "warm": warm,
+        "settings": {"ocr": get_ocr_settings(), "preprocess": get_preprocess_pipeline("forge_slots"),
+                     "backend": ocr_scanner.reader_backend},
+        "stages": stages,
+        "peak_rss_mb": peak_mb,
+        "accuracy": correct / labelled if labelled else None,
+        "failures": failures,
+    }
+
+
+def compare_reports(report, baseline):
+    """Regressions of report against baseline, as readable strings"""
+    regressions = []
+    if report["accuracy"] is not None and baseline.get("accuracy") is not None:
+        if report["accuracy"] < baseline["accuracy"]:
+            regressions.append(f"accuracy {baseline['accuracy']:.1%} -> {report['accuracy']:.1%}")
+    for stage, stats in report["stages"].items():
+        base = baseline.get("stages", {}).get(stage)
+        if not base:
+            continue
+        for key in ("p50_ms", "p95_ms"):
+            old, new = base[key], stats[key]
+            if new > old * (1 + REGRESSION_TOLERANCE) and new - old > REGRESSION_MIN_MS:
+                regressions.append(f"{stage} {key[:3]} {old:.1f} -> {new:.1f} ms")
+    old_mb, new_mb = baseline.get("peak_rss_mb"), report["peak_rss_mb"]
+    if old_mb and new_mb and new_mb > old_mb * (1 + REGRESSION_TOLERANCE):
+        regressions.append(f"peak RSS {old_mb:.0f} -> {new_mb:.0f} MB")
+    return regressions
+
+
+def print_report(report, baseline=None):
+    print(f"Corpus: {report['corpus']} ({report['frames']} frames, {report['labelled']} labelled)\n")
+    print(f"{'stage':<14} {'calls':>6} {'p50 ms':>9} {'p95 ms':>9}" + ("   baseline p50/p95" if baseline else ""))
+    for stage, stats in report["stages"].items():
+        line = f"{stage:<14} {stats['calls']:>6} {stats['p50_ms']:>9.1f} {stats['p95_ms']:>9.1f}"
+        base = (baseline or {}).get("stages", {}).get(stage)
+        if base:
+            line += f"   {base['p50_ms']:.1f} / {base['p95_ms']:.1f}"
+        print(line)
+    if report["peak_rss_mb"] is not None:
+        print(f"\npeak RSS: {report['peak_rss_mb']:.0f} MB")
+    if report["accuracy"] is not None:
+        print(f"exact-match accuracy: {report['accuracy']:.1%}")
+    for failure in report["failures"][:10]:
+        print(f"  {failure['frame']}: expected {failure['expected']}, got {failure['detected']}")
+
+
+def bench_corpus(args):
+    """scan_for_ores latency, memory and accuracy over a labelled corpus"""
+    report = run_corpus(args.corpus, warm=args.warm)
+    baseline = None
+    if args.baseline and os.path.exists(args.baseline):
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+    print_report(report, baseline)
+
+    if args.report:
+        with open(args.report, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"\nReport written to {args.report}")
+
+    if baseline:
+        regressions = compare_reports(report, baseline)
+        if regressions:
+            print("\nREGRESSIONS vs baseline:")
+            for line in regressions:
+                print(f"  {line}")
+            sys.exit(1)
+        print("\nNo regressions vs baseline")
+    elif args.baseline:
+        with open(args.baseline, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"\nNo baseline yet - saved this run as {args.baseline}")
+
+
+def bench_synth(args):
+    """Matcher + count assignment (or full OCR) accuracy on synthetic frames"""
+    import ocr_scanner
+    from synth import generate
+
+    config = {"misread_rate": args.misread, "noise": args.noise, "scale": tuple(args.scale),
+              "font_jitter": args.font_jitter, "position_jitter": args.position_jitter}
+    if args.ocr:
+        ocr_scanner.get_reader()
+        ocr_scanner.templates = None
+
+    times, correct, failures = [], 0, []
+    for frame, expected, ocr_results in generate(args.frames, args.seed, config):
+        if args.ocr:
+            reset_scan_caches(ocr_scanner)
+        start = time.perf_counter()
+        if args.ocr:
+            ocr_results = ocr_scanner.read_text(frame)
+        detected, _ = ocr_scanner.match_ores(ocr_results)
+        times.append((time.perf_counter() - start) * 1000)
+        found = {ore: info["count"] for ore, info in detected.items()}
+        want = {ore: info["count"] for ore, info in expected.items()}
+        if found == want:
+            correct += 1
+        elif len(failures) < 10:
+            failures.append((want, found))
+
+    what = "OCR + matching" if args.ocr else "matching on ground-truth OCR results"
+    print(f"{args.frames} synthetic frames, {what} (misread rate {args.misread})")
+    print(format_times(times))
+    print(f"throughput: {len(times) / (sum(times) / 1000):.0f} frames/s")
+    print(f"exact-match accuracy: {correct / len(times):.1%}")
+    for want, found in failures:
+        print(f"  expected {want}, got {found}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Forger Companion OCR benchmarks")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p = sub.add_parser("backends", help="compare OCR device/thread/quantization settings")
+    p.add_argument("frame", help="recorded frame (PNG) of the forge slots region")
+    p.add_argument("--runs", type=int, default=10)
+    p.set_defaults(func=bench_backends)
+
+    p = sub.add_parser("patterns", help="ore pattern matcher vs. the per-pattern loop")
+    p.add_argument("--items", type=int, default=20000)
+    p.set_defaults(func=bench_patterns)
+
+    p = sub.add_parser("preprocess", help="match rate and latency of OCR preprocessing presets")
+    p.add_argument("corpus", help="dir of frames (PNG) with a labels.json of expected ore counts")
+    p.add_argument("--presets", help="comma-separated preset names (default: all)")
+    p.set_defaults(func=bench_preprocess)
+
+    p = sub.add_parser("corpus", help="scan latency, memory and accuracy over a labelled corpus")
+    p.add_argument("corpus", help="dir of frames (PNG) with a labels.json of expected ore counts")
+    p.add_argument("--report", help="write the JSON report here")
+    p.add_argument("--baseline", help="JSON report to compare against (created if missing)")
+    p.add_argument("--warm", action="store_true",
+                   help="keep the frame/layout/tile caches and UI detector between frames, "
+                        "like a replayed session")
+    p.set_defaults(func=bench_corpus)
+
+    p = sub.add_parser("synth", help="accuracy and throughput on synthetic forge-slot frames")
+    p.add_argument("--frames", type=int, default=5000)
+    p.add_argument("--seed", type=int, default=0)
+    p.add_argument("--misread", type=float, default=0.0, help="per-character OCR misread rate")
+    p.add_argument("--ocr", action="store_true", help="run OCR on the rendered frames instead")
+    p.add_argument("--noise", type=float, default=0.0)
+    p.add_argument("--scale", type=float, nargs=2, default=[1.0, 1.0], metavar=("MIN", "MAX"))
+    p.add_argument("--font-jitter", type=int, default=0)
+    p.add_argument("--position-jitter", type=int, default=0)
+    p.set_defaults(func=bench_synth)
+
+    args = parser.parse_args()
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,325 @@
+"""Frame sources for the OCR scanner
+
+Everything that scans takes a CaptureSource, so the same code runs on the
+live screen or offline:
+- CaptureSession (alias ScreenSource) grabs the screen through mss
+- DirectorySource plays back a folder of PNG screenshots
+- RecordingSource replays a memory-mapped recording written by FrameRecorder
+  (e.g. through TeeSource during real play), as fast as possible or at any
+  multiple of the recorded speed
+
+Offline sources hold frames of some screen area. When a scan asks for a
+region inside that area, the region is cropped out; when the frames already
+are the region (same size), they are returned as-is.
+"""
+
+import json
+import os
+import threading
+import time
+from pathlib import Path
+
+import numpy as np
+
+from log import get_logger
+
+log = get_logger("capture")
+
+
+class EndOfSource(Exception):
+    """An offline source has no more frames"""
+
+
+class CaptureSource:
+    """Something that can produce RGB frames of a screen region"""
+
+    def grab(self, region=None):
+        """Capture a region (or the whole source area) as an RGB uint8 array"""
+        raise NotImplementedError
+
+    def close(self):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def crop_region(frame, region, origin=(0, 0)):
+    """Cut a screen region out of a frame whose top-left is at screen `origin`"""
+    if not region:
+        return frame
+    h, w = frame.shape[:2]
+    if (region["width"], region["height"]) == (w, h):
+        return frame  # already the region
+    x, y = region["x"] - origin[0], region["y"] - origin[1]
+    if x < 0 or y < 0 or x + region["width"] > w or y + region["height"] > h:
+        raise ValueError(f"Region {region} is outside the {w}x{h} frame at {origin}")
+    return frame[y:y + region["height"], x:x + region["width"]]
+
+
+class CaptureSession(CaptureSource):
+    """Long-lived screen grabber that reuses one mss handle and frame buffers.
+
+    Frames are copied once, straight from mss' BGRA bytes into a preallocated
+    RGB array via a channel-reversing view (no PIL round-trip). The returned
+    array is owned by the session and is overwritten by the next grab of the
+    same size on the same thread - copy it if you need to keep it.
+    """
+
+    def __init__(self):
+        self._sct = None
+        self._lock = threading.Lock()
+        self._local = threading.local()  # per-thread buffers, keyed by shape
+
+    def _handle(self):
+        if self._sct is None:
+            import mss  # only needed for live capture
+            self._sct = mss.mss()
+        return self._sct
+
+    def _buffer(self, shape):
+        buffers = getattr(self._local, "buffers", None)
+        if buffers is None:
+            buffers = self._local.buffers = {}
+        buf = buffers.get(shape)
+        if buf is None:
+            buf = buffers[shape] = np.empty(shape, dtype=np.uint8)
+        return buf
+
+    def grab(self, region=None):
+        """Capture a region (or the primary monitor) as an RGB uint8 array"""
+        with self._lock:
+            sct = self._handle()
+            if region:
+                monitor = {
+                    "left": region["x"],
+                    "top": region["y"],
+                    "width": region["width"],
+                    "height": region["height"]
+                }
+            else:
+                # Primary monitor
+                monitor = sct.monitors[1]
+            screenshot = sct.grab(monitor)
+
+        w, h = screenshot.size
+        bgra = np.frombuffer(screenshot.raw, dtype=np.uint8).reshape(h, w, 4)
+        frame = self._buffer((h, w, 3))
+        # BGRA -> RGB: reverse the first three channels, drop alpha
+        np.copyto(frame, bgra[:, :, 2::-1])
+        return frame
+
+    def close(self):
+        with self._lock:
+            if self._sct is not None:
+                self._sct.close()
+                self._sct = None
+
+
+ScreenSource = CaptureSession
+
+
+class DirectorySource(CaptureSource):
+    """Plays back the PNG screenshots in a folder, in file-name order.
+
+    origin is the screen position of the screenshots' top-left corner
+    (default (0, 0): full-monitor screenshots).
+    """
+
+    def __init__(self, path, loop=False, origin=(0, 0)):
+        self.path = Path(path)
+        self.files = sorted(p for p in self.path.iterdir() if p.suffix.lower() == ".png")
+        if not self.files:
+            raise FileNotFoundError(f"No PNG frames in {self.path}")
+        self.loop = loop
+        self.origin = tuple(origin)
+        self.index = 0
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.files)
+
+    def grab(self, region=None):
+        from PIL import Image
+        with self._lock:
+            if self.index >= len(self.files):
+                if not self.loop:
+                    raise EndOfSource(str(self.path))
+                self.index = 0
+            path = self.files[self.index]
+            self.index += 1
+        frame = np.asarray(Image.open(path).convert("RGB"))
+        return crop_region(frame, region, self.origin)
+
+
+# ============ RECORDINGS ============
+# A recording is a folder with:
+#   meta.json  {"version": 1, "shape": [h, w, 3], "origin": [x, y]}
+#   frames.u8  raw RGB frames back to back (memory-mapped on replay)
+#   times.f8   float64 capture time of each frame, seconds from the first
+
+RECORDING_VERSION = 1
+
+
+class FrameRecorder:
+    """Appends frames to a recording; all frames must have the first frame's shape"""
+
+    def __init__(self, path, origin=(0, 0)):
+        self.path = Path(path)
+        self.path.mkdir(parents=True, exist_ok=True)
+        self.origin = tuple(origin)
+        self.shape = None
+        self.count = 0
+        self.skipped = 0
+        self._start = None
+        self._frames = None
+        self._times = None
+        self._lock = threading.Lock()
+
+    def write(self, frame, timestamp=None, origin=None):
+        """Append one frame. Returns False if it was skipped (wrong shape).
+
+        origin (screen position of the frame) is only used for the first frame.
+        """
+        now = time.perf_counter() if timestamp is None else timestamp
+        with self._lock:
+            if self.shape is None:
+                self.shape = frame.shape
+                if origin is not None:
+                    self.origin = tuple(origin)
+                self._start = now
+                with open(self.path / "meta.json", "w") as f:
+                    json.dump({"version": RECORDING_VERSION, "shape": list(frame.shape),
+                               "origin": list(self.origin)}, f)
+                self._frames = open(self.path / "frames.u8", "wb")
+                self._times = open(self.path / "times.f8", "wb")
+            elif frame.shape != self.shape:
+                self.skipped += 1
+                return False
+            self._frames.write(np.ascontiguousarray(frame, dtype=np.uint8).tobytes())
+            self._times.write(np.float64(now - self._start).tobytes())
+            self.count += 1
+            return True
+
+    def close(self):
+        with self._lock:
+            for f in (self._frames, self._times):
+                if f is not None:
+                    f.close()
+            self._frames = self._times = None
+
+
+class RecordingSource(CaptureSource):
+    """Replays a FrameRecorder recording from a memory map.
+
+    speed=None returns the next frame on every grab (as fast as the scanner
+    runs); speed=1.0 follows the recorded timing, 2.0 twice as fast, etc. -
+    like live capture, frames that went by between grabs are skipped.
+    """
+
+    def __init__(self, path, speed=None, loop=False):
+        self.path = Path(path)
+        with open(self.path / "meta.json") as f:
+            meta = json.load(f)
+        if meta.get("version") != RECORDING_VERSION:
+            raise ValueError(f"Unsupported recording version: {meta.get('version')}")
+        self.shape = tuple(meta["shape"])
+        self.origin = tuple(meta.get("origin", (0, 0)))
+        frame_size = int(np.prod(self.shape))
+        # A recording cut short mid-frame keeps only its whole frames
+        count = os.path.getsize(self.path / "frames.u8") // frame_size
+        self.times = np.fromfile(self.path / "times.f8", dtype=np.float64)[:count]
+        count = len(self.times)
+        self.frames = np.memmap(self.path / "frames.u8", dtype=np.uint8, mode="r",
+                                shape=(count,) + self.shape) if count else None
+        self.speed = speed
+        self.loop = loop
+        self.index = 0
+        self._clock_start = None
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.times)
+
+    def _next_index(self):
+        count = len(self.times)
+        if self.speed is None:
+            if self.index >= count:
+                if not self.loop or not count:
+                    raise EndOfSource(str(self.path))
+                self.index = 0
+            self.index += 1
+            return self.index - 1
+
+        if not count:
+            raise EndOfSource(str(self.path))
+        now = time.perf_counter()
+        if self._clock_start is None:
+            self._clock_start = now
+        elapsed = (now - self._clock_start) * self.speed
+        if elapsed > self.times[-1]:
+            if self.loop:
+                elapsed %= self.times[-1] + 1e-3
+            elif self.index < count:
+                self.index = count  # hand out the last frame once before ending
+                return count - 1
+            else:
+                raise EndOfSource(str(self.path))
+        # Latest frame recorded at or before the replay clock
+        return max(0, int(np.searchsorted(self.times, elapsed, side="right")) - 1)
+
+    def grab(self, region=None):
+        with self._lock:
+            index = self._next_index()
+        # Crops are views of the memory map - nothing is read until OCR touches it
+        return crop_region(self.frames[index], region, self.origin)
+
+    def close(self):
+        self.frames = None
+
+
+class TeeSource(CaptureSource):
+    """Passes frames through from another source while recording them"""
+
+    def __init__(self, source, recorder):
+        self.source = source
+        self.recorder = recorder
+
+    def grab(self, region=None):
+        frame = self.source.grab(region)
+        self.recorder.write(frame, origin=(region["x"], region["y"]) if region else None)
+        return frame
+
+    def close(self):
+        self.recorder.close()
+        self.source.close()
+
+
+def open_source(spec=None, speed=None, loop=False):
+    """Build a source from a spec: None/"screen", a recording folder or a PNG folder"""
+    if spec in (None, "", "screen"):
+        return CaptureSession()
+    path = Path(spec)
+    if (path / "meta.json").exists():
+        return RecordingSource(path, speed=speed, loop=loop)
+    if path.is_dir():
+        return DirectorySource(path, loop=loop)
+    raise FileNotFoundError(f"No capture source at {spec}")
+
+
+def create_source(capture_settings):
+    """Capture source for the "capture" settings, recording it if record_dir is set"""
+    source = open_source(capture_settings.get("source"), speed=capture_settings.get("replay_speed"))
+    record_dir = capture_settings.get("record_dir")
+    if record_dir:
+        path = Path(record_dir).expanduser() / time.strftime("%Y%m%d-%H%M%S")
+        log.info("Recording frames to %s", path)
+        source = TeeSource(source, FrameRecorder(path))
+    return source
+
+
+# Shared session used when callers don't pass their own
+default_session = CaptureSession()
@@ -3,6 +3,10 @@
 import json
 from pathlib import Path
 
+from log import get_logger
+
+log = get_logger("config")
+
 # Config directory (same as auth)
 CONFIG_DIR = Path.home() / ".forger-companion"
 SETTINGS_FILE = CONFIG_DIR / "settings.json"
@@ -32,6 +36,39 @@ DEFAULT_SETTINGS = {
         "always_on_top": True,
         "opacity": 0.95,
         "scan_interval": 2.0,    # seconds
+        "profile_seconds": 10,   # Length of a debug-panel profile
+    },
+    "ocr": {
+        "diff_threshold": 6.0,   # Max per-cell grey-level change still treated as "same frame"
+        "device": "auto",        # "auto", "cpu" or "cuda"
+        "threads": 0,            # Torch intra-op threads on CPU (0 = auto)
+        "quantize": True,        # int8 dynamic quantization of the CPU models
+        "templates": True,       # Template-matching fast path before EasyOCR recognition
+        "template_threshold": 0.92,  # Min NCC score to trust a template match
+        "tile_cache_size": 256,  # Recognized text boxes kept by pixel hash (0 = off)
+        "ui_detector": True,     # Skip OCR while a pixel check sees the forge UI closed
+        "worker_process": True,  # Run EasyOCR in a separate process (keeps the overlay smooth)
+        "unload_after": 300,     # s without the forge UI before the OCR model is unloaded (0 = never)
+        "memory_budget_mb": 0,   # Unload sooner when the app uses more than this (0 = no budget)
+    },
+    "capture": {
+        "source": "screen",      # "screen", a folder of PNG frames or a recording folder (replay)
+        "replay_speed": None,    # None = as fast as scans run, 1.0 = recorded speed
+        "record_dir": "",        # If set, live frames are recorded here for later replay
+        "auto_locate": True,     # Follow the forge UI when the game window moves or resizes
+        "pause_when_hidden": True,  # Stop capture/OCR while Roblox is minimized or not focused
+    },
+    "preprocess": {
+        # OCR preprocessing preset per region (see preprocess.PRESETS)
+        "forge_slots": "raw",
+        "ores_panel": "raw",
+    },
+    "logging": {
+        "level": "INFO",         # "DEBUG" adds per-scan OCR details (rate-limited)
+        "debug_interval": 1.0,   # Min seconds between repeats of the same debug message
+        "file": "",              # Rotating log file ("" = console only)
+        "max_bytes": 1000000,
+        "backups": 3,
     }
 }
 
@@ -54,9 +91,17 @@ def load_settings() -> dict:
                     settings["macro_buttons"] = {**DEFAULT_SETTINGS["macro_buttons"], **saved["macro_buttons"]}
                 if "macro_settings" in saved:
                     settings["macro_settings"] = {**DEFAULT_SETTINGS["macro_settings"], **saved["macro_settings"]}
+                if "ocr" in saved:
+                    settings["ocr"] = {**DEFAULT_SETTINGS["ocr"], **saved["ocr"]}
+                if "capture" in saved:
+                    settings["capture"] = {**DEFAULT_SETTINGS["capture"], **saved["capture"]}
+                if "preprocess" in saved:
+                    settings["preprocess"] = {**DEFAULT_SETTINGS["preprocess"], **saved["preprocess"]}
+                if "logging" in saved:
+                    settings["logging"] = {**DEFAULT_SETTINGS["logging"], **saved["logging"]}
                 return settings
     except Exception as e:
-        print(f"[config] Load error: {e}")
+        log.error("Load error: %s", e)
     return DEFAULT_SETTINGS.copy()
 
 
@@ -66,9 +111,9 @@ def save_settings(settings: dict):
         CONFIG_DIR.mkdir(parents=True, exist_ok=True)
         with open(SETTINGS_FILE, "w") as f:
             json.dump(settings, f, indent=2)
-        print(f"[config] Settings saved")
+        log.info("Settings saved")
     except Exception as e:
-        print(f"[config] Save error: {e}")
+        log.error("Save error: %s", e)
 
 
 def get_region(name: str) -> dict | None:
@@ -86,6 +131,13 @@ def set_region(name: str, region: dict):
     save_settings(settings)
 
 
+def set_regions(regions: dict):
+    """Set several regions with a single settings write"""
+    settings = load_settings()
+    settings.setdefault("regions", {}).update(regions)
+    save_settings(settings)
+
+
 def is_setup_complete() -> bool:
     """Check if first-time setup has been completed"""
     settings = load_settings()
@@ -135,6 +187,30 @@ def set_macro_settings(macro_settings: dict):
     save_settings(settings)
 
 
+def get_ocr_settings() -> dict:
+    """Get OCR tuning settings"""
+    settings = load_settings()
+    return settings.get("ocr", DEFAULT_SETTINGS["ocr"])
+
+
+def get_capture_settings() -> dict:
+    """Get capture source settings"""
+    settings = load_settings()
+    return settings.get("capture", DEFAULT_SETTINGS["capture"])
+
+
+def get_log_settings() -> dict:
+    """Get logging settings"""
+    settings = load_settings()
+    return settings.get("logging", DEFAULT_SETTINGS["logging"])
+
+
+def get_preprocess_pipeline(region_name: str):
+    """Get the OCR preprocessing preset (or stage dict) for a region"""
+    settings = load_settings()
+    return settings.get("preprocess", {}).get(region_name, "raw")
+
+
 def is_macro_setup_complete() -> bool:
     """Check if all macro buttons are configured"""
     settings = load_settings()
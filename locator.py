@@ -0,0 +1,334 @@
+"""Forge UI localisation: finds the forge slots on screen when the game moves
+
+The first time OCR confirms the forge UI in the configured forge_slots
+region, that crop becomes the locator's template. Every tick, confirm()
+compares the freshly captured region with the template (a strided sample,
+well under a millisecond). Only when that fails does search() look for the
+template in a 4x downsampled capture of the whole monitor, at a range of
+scales (window resizes), with FFT-based normalized cross-correlation. The
+best hit is refined at full resolution in position and scale, and all
+configured regions are moved and scaled along with it.
+
+Searches back off exponentially while they don't move anything (forge
+closed, or its contents changed until OCR relearns the template), so a
+closed UI costs one cheap check per tick.
+"""
+
+import sys
+import os
+import threading
+import time
+sys.path.insert(0, os.path.dirname(__file__))
+
+import numpy as np
+from PIL import Image
+
+from config import CONFIG_DIR
+from log import get_logger
+
+log = get_logger("locator")
+
+LOCATOR_FILE = CONFIG_DIR / "locator.npz"
+
+DOWNSAMPLE = 4                 # monitor/template reduction for the coarse search
+SCALES = np.geomspace(0.5, 2.0, 19)  # UI sizes tried, relative to the template (8% apart)
+CHECK_SAMPLES = (48, 16)       # (w, h) sample grid of the per-tick check
+CONFIRM_MIN = 0.6              # NCC for the region to still hold the forge UI
+COARSE_MIN = 0.45              # downsampled NCC worth refining at full resolution
+FOUND_MIN = 0.7                # full-resolution NCC for a search hit
+MIN_STD = 2.0                  # grey levels; flatter screen windows aren't scored
+REFINE_MARGIN = 2 * DOWNSAMPLE  # px searched around the coarse hit at full resolution
+SEARCH_BACKOFF = (2.0, 60.0)   # first and longest wait between failed searches (s)
+
+
+def to_grey(img):
+    if img.ndim == 2:
+        return img.astype(np.float32)
+    return img.mean(axis=2, dtype=np.float32)
+
+
+def _resize(grey, w, h):
+    w, h = max(1, w), max(1, h)
+    # Box filter when shrinking, to match how the screen is downsampled
+    resample = Image.BOX if w < grey.shape[1] else Image.BILINEAR
+    return np.asarray(Image.fromarray(grey).resize((w, h), resample), dtype=np.float32)
+
+
+def _sample(grey, w, h):
+    """Point-sample a w x h grid (no filtering - this is the hot path)"""
+    ys = np.linspace(0, grey.shape[0] - 1, h).astype(np.intp)
+    xs = np.linspace(0, grey.shape[1] - 1, w).astype(np.intp)
+    return grey[ys[:, None], xs[None, :]]
+
+
+def ncc(a, b):
+    """Normalized cross-correlation of two same-sized arrays"""
+    a = a - a.mean()
+    b = b - b.mean()
+    denom = np.sqrt((a * a).sum() * (b * b).sum())
+    return float((a * b).sum() / denom) if denom > 1e-6 else 0.0
+
+
+def _fast_len(n):
+    """Smallest 2^a * 3^b * 5^c >= n (sizes pocketfft handles quickly)"""
+    best = 1 << (n - 1).bit_length()
+    f5 = 1
+    while f5 < best:
+        f35 = f5
+        while f35 < best:
+            size = f35
+            while size < n:
+                size *= 2
+            best = min(best, size)
+            f35 *= 3
+        f5 *= 5
+    return best
+
+
+class TemplateMatcher:
+    """NCC template matching against one image at many template sizes.
+
+    The image spectrum and its integral images are computed once, so every
+    extra template size costs one forward and one inverse FFT.
+    """
+
+    def __init__(self, image, max_size):
+        self.image = image
+        ih, iw = image.shape
+        self.shape = (_fast_len(ih + max_size[0] - 1), _fast_len(iw + max_size[1] - 1))
+        self.spectrum = np.fft.rfft2(image, self.shape)
+        image64 = image.astype(np.float64)
+        self.integral = np.pad(image64.cumsum(0).cumsum(1), ((1, 0), (1, 0)))
+        self.integral_sq = np.pad((image64 * image64).cumsum(0).cumsum(1), ((1, 0), (1, 0)))
+
+    def match(self, templ):
+        """NCC of templ at every valid position in the image.
+
+        Returns:
+            ndarray: (ih - th + 1, iw - tw + 1) scores in [-1, 1]
+        """
+        ih, iw = self.image.shape
+        th, tw = templ.shape
+        if th > ih or tw > iw:
+            return np.full((0, 0), -1.0, dtype=np.float32)
+        t = templ - templ.mean()
+        t_norm = np.sqrt((t * t).sum())
+        if t_norm < 1e-6:
+            return np.zeros((ih - th + 1, iw - tw + 1), dtype=np.float32)
+
+        # Correlation = convolution with the flipped template
+        spectrum = self.spectrum * np.fft.rfft2(t[::-1, ::-1], self.shape)
+        numerator = np.fft.irfft2(spectrum, self.shape)[th - 1:ih, tw - 1:iw]
+
+        def window_sums(integral):
+            return integral[th:, tw:] - integral[:-th, tw:] - integral[th:, :-tw] + integral[:-th, :-tw]
+
+        s1 = window_sums(self.integral)
+        variance = np.maximum(window_sums(self.integral_sq) - s1 * s1 / (th * tw), 0.0)
+        # Flat windows (std under MIN_STD) have no pattern to correlate with, and
+        # FFT rounding over a near-zero variance gives scores far outside [-1, 1]
+        flat = variance < (MIN_STD ** 2) * th * tw
+        scores = numerator / (np.sqrt(np.maximum(variance, 1e-12)) * t_norm)
+        scores[flat] = 0.0
+        return np.clip(scores, -1.0, 1.0).astype(np.float32)
+
+
+def match_template(image, templ):
+    """NCC of templ at every valid position in image (FFT correlation)"""
+    return TemplateMatcher(image, templ.shape).match(templ)
+
+
+def _best(scores):
+    if scores.size == 0:
+        return -1.0, (0, 0)
+    y, x = np.unravel_index(int(scores.argmax()), scores.shape)
+    return float(scores[y, x]), (int(x), int(y))
+
+
+class ForgeLocator:
+    """Template of the forge slots region and where it was last found"""
+
+    def __init__(self):
+        self.template = None   # full-resolution grey crop of the forge slots
+        self.rect = None       # region dict the template was last seen at
+        self.searches = 0
+        self.relocations = 0
+        self.last_score = None
+        self._check = None     # CHECK_SAMPLES point sample of the template
+        self._next_search = 0.0
+        self._backoff = SEARCH_BACKOFF[0]
+        self._lock = threading.Lock()
+
+    def has_template(self):
+        return self.template is not None
+
+    def learn(self, frame, region):
+        """Use a capture OCR confirmed as the forge UI as the template"""
+        with self._lock:
+            self.template = to_grey(frame)
+            self.rect = dict(region)
+            self._check = _sample(self.template, *CHECK_SAMPLES)
+            self.last_score = None
+            self._backoff = SEARCH_BACKOFF[0]
+            self._next_search = 0.0
+        self.save()
+
+    def needs_learning(self, region):
+        """True if an OCR-confirmed frame of this region should (re)build the template:
+        none yet, the region was changed by hand, or the UI no longer looks like it
+        """
+        return (self.template is None or self.rect != region
+                or (self.last_score is not None and self.last_score < CONFIRM_MIN))
+
+    def confirm(self, frame, region):
+        """Cheap per-tick check: does this capture of region still show the template?"""
+        if self._check is None or region != self.rect:
+            return True  # nothing to compare with yet, or the region was set by hand
+        self.last_score = ncc(_sample(to_grey(frame), *CHECK_SAMPLES), self._check)
+        return self.last_score >= CONFIRM_MIN
+
+    def search_due(self):
+        return self.template is not None and time.monotonic() >= self._next_search
+
+    def search(self, screen, origin=(0, 0)):
+        """Find the template in a full-monitor capture whose top-left is at screen origin.
+
+        Returns:
+            tuple: (region, score) - region is None if nothing matched well enough
+        """
+        self.searches += 1
+        self._defer()
+        templ = self.template
+        th, tw = templ.shape
+        h, w = screen.shape[:2]
+        # Box-filter the colour capture down first: far less to convert to grey
+        small = to_grey(np.asarray(Image.fromarray(np.ascontiguousarray(screen)).reduce(DOWNSAMPLE)))
+
+        # Coarse: every scale on the downsampled screen
+        sizes = [(scale, round(tw * scale / DOWNSAMPLE), round(th * scale / DOWNSAMPLE)) for scale in SCALES]
+        sizes = [(scale, sw, sh) for scale, sw, sh in sizes
+                 if sw >= 8 and sh >= 4 and sw <= small.shape[1] and sh <= small.shape[0]]
+        if not sizes:
+            return None, -1.0
+        matcher = TemplateMatcher(small, (max(sh for _, _, sh in sizes), max(sw for _, sw, _ in sizes)))
+        best = (-1.0, None, None)
+        for scale, sw, sh in sizes:
+            score, pos = _best(matcher.match(_resize(templ, sw, sh)))
+            if score > best[0]:
+                best = (score, scale, pos)
+        score, scale, pos = best
+        if score < COARSE_MIN:
+            return None, score
+
+        # Fine: full resolution around the coarse hit, at the coarse scale and its neighbours
+        step = SCALES[1] / SCALES[0]
+        fine_scales = scale * step ** np.linspace(-0.5, 0.5, 3)
+        pad = REFINE_MARGIN + int(max(tw, th) * (fine_scales[-1] - scale)) + 1
+        x0 = max(0, pos[0] * DOWNSAMPLE - pad)
+        y0 = max(0, pos[1] * DOWNSAMPLE - pad)
+        x1 = min(w, pos[0] * DOWNSAMPLE + round(tw * fine_scales[-1]) + pad)
+        y1 = min(h, pos[1] * DOWNSAMPLE + round(th * fine_scales[-1]) + pad)
+        window = to_grey(screen[y0:y1, x0:x1])
+        matcher = TemplateMatcher(window, (round(th * fine_scales[-1]), round(tw * fine_scales[-1])))
+        tried = {}
+
+        def try_scale(fine_scale):
+            fw, fh = round(tw * fine_scale), round(th * fine_scale)
+            if (fw, fh) not in tried:
+                fine_score, (dx, dy) = _best(matcher.match(_resize(templ, fw, fh)))
+                tried[fw, fh] = (fine_score, x0 + dx, y0 + dy, fw, fh)
+            return tried[fw, fh]
+
+        best = max((try_scale(fine_scale) for fine_scale in fine_scales), key=lambda hit: hit[0])
+        # Thin text only lines up within a pixel or two: halve the scale step
+        # around the best size until it stops changing the size
+        spacing = step ** 0.25
+        while True:
+            spacing **= 0.5
+            best_scale = best[3] / tw
+            neighbours = [min(max(best_scale * factor, fine_scales[0]), fine_scales[-1])
+                          for factor in (spacing, 1 / spacing)]
+            if all(round(tw * n) == best[3] for n in neighbours):
+                break
+            best = max([best] + [try_scale(n) for n in neighbours], key=lambda hit: hit[0])
+        score, x, y, sw, sh = best
+        if score < FOUND_MIN:
+            return None, score
+        # The refined box must be the coarse hit sharpened, not something else in
+        # the window: size within half a scale step of the coarse scale, top-left
+        # within the margin plus what that size change can shift it
+        fine_scale = sw / tw
+        allowed = REFINE_MARGIN + max(tw, th) * abs(fine_scale - scale)
+        drift = max(abs(x - pos[0] * DOWNSAMPLE), abs(y - pos[1] * DOWNSAMPLE))
+        if drift > allowed or abs(np.log(fine_scale / scale)) > np.log(step) / 2 + 0.01:
+            log.debug("Search hit at scale %.2f refined to %.2f, %d px away - rejected", scale, fine_scale, drift)
+            return None, score
+
+        region = {"x": int(x) + origin[0], "y": int(y) + origin[1], "width": int(sw), "height": int(sh)}
+        return region, score
+
+    def _defer(self):
+        # The next search waits longer each time; a relocation or new template resets this
+        with self._lock:
+            self._next_search = time.monotonic() + self._backoff
+            self._backoff = min(self._backoff * 2, SEARCH_BACKOFF[1])
+
+    def relocate(self, region):
+        """Accept a search hit as the new forge slots position.
+
+        Returns:
+            tuple: (dx, dy, scale) screen transform from the old position
+        """
+        old = self.rect
+        scale = region["width"] / old["width"] if old and old["width"] else 1.0
+        with self._lock:
+            self.rect = dict(region)
+            self.relocations += 1
+            self._backoff = SEARCH_BACKOFF[0]
+            self._next_search = 0.0
+        self.save()
+        if not old:
+            return 0, 0, 1.0
+        return region["x"] - old["x"], region["y"] - old["y"], scale
+
+    def save(self, path=LOCATOR_FILE):
+        if self.template is None:
+            return
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            rect = [self.rect[k] for k in ("x", "y", "width", "height")]
+            with open(path, "wb") as f:
+                np.savez_compressed(f, template=self.template.astype(np.uint8), rect=np.array(rect))
+        except Exception as e:
+            log.error("Save error: %s", e)
+
+    def load(self, path=LOCATOR_FILE):
+        try:
+            if not path.exists():
+                return
+            data = np.load(path)
+            x, y, width, height = (int(v) for v in data["rect"])
+            self.template = data["template"].astype(np.float32)
+            self.rect = {"x": x, "y": y, "width": width, "height": height}
+            self._check = _sample(self.template, *CHECK_SAMPLES)
+        except Exception as e:
+            log.error("Load error: %s", e)
+
+    def stats(self):
+        return {
+            "searches": self.searches,
+            "relocations": self.relocations,
+            "last_score": self.last_score,
+        }
+
+
+def move_region(region, anchor, dx, dy, scale):
+    """Move/scale another region the way the anchor region (old position) moved"""
+    if not region:
+        return region
+    return {
+        "x": int(round(anchor["x"] + dx + (region["x"] - anchor["x"]) * scale)),
+        "y": int(round(anchor["y"] + dy + (region["y"] - anchor["y"]) * scale)),
+        "width": int(round(region["width"] * scale)),
+        "height": int(round(region["height"] * scale)),
+    }
@@ -0,0 +1,143 @@
+"""Logging for Forger Companion
+
+All modules log through get_logger(name) ("forger.<name>" loggers). Records
+are put on a queue by a QueueHandler and written to the console (and the
+optional rotating log file) by a QueueListener thread, so scan and macro
+loops never block on a slow console.
+
+Per-frame diagnostics go to get_debug_logger(name): DEBUG-only, off unless
+the level is DEBUG, and rate-limited per message so a 4 Hz scan loop can't
+flood the console even then. Guard expensive messages with
+`if debug.isEnabledFor(logging.DEBUG)`.
+
+Configured from the "logging" settings section by setup_logging(); scripts
+that never call it get INFO to the console.
+"""
+
+import atexit
+import logging
+import logging.handlers
+import queue
+import sys
+import threading
+import time
+from pathlib import Path
+
+ROOT = "forger"
+FORMAT = "[%(short_name)s] %(message)s"
+FILE_FORMAT = "%(asctime)s %(levelname)-7s [%(short_name)s] %(message)s"
+
+_listener = None
+_lock = threading.Lock()
+
+
+class _ShortNameFilter(logging.Filter):
+    """Adds %(short_name)s: "forger.ocr.debug" -> "ocr" """
+
+    def filter(self, record):
+        name = record.name
+        if name.startswith(ROOT + "."):
+            name = name[len(ROOT) + 1:]
+        if name.endswith(".debug"):
+            name = name[:-len(".debug")]
+        record.short_name = name
+        return True
+
+
+class RateLimitFilter(logging.Filter):
+    """Lets each message template through at most once per interval; counts the rest"""
+
+    def __init__(self, interval=1.0):
+        super().__init__()
+        self.interval = interval
+        self.suppressed = 0
+        self._last = {}
+        self._lock = threading.Lock()
+
+    def filter(self, record):
+        if self.interval <= 0:
+            return True
+        now = time.monotonic()
+        key = (record.name, record.msg)
+        with self._lock:
+            if now - self._last.get(key, -self.interval) < self.interval:
+                self.suppressed += 1
+                return False
+            self._last[key] = now
+        return True
+
+
+_debug_filter = RateLimitFilter()
+
+
+def setup_logging(log_settings=None):
+    """(Re)configure the forger loggers from the "logging" settings section"""
+    global _listener
+    log_settings = log_settings or {}
+    console = logging.StreamHandler(sys.stdout)
+    console.setFormatter(logging.Formatter(FORMAT))
+    handlers = [console]
+    file_error = None
+    if log_settings.get("file"):
+        path = Path(log_settings["file"]).expanduser()
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            file_handler = logging.handlers.RotatingFileHandler(
+                path, maxBytes=log_settings.get("max_bytes", 1_000_000),
+                backupCount=log_settings.get("backups", 3), encoding="utf-8")
+            file_handler.setFormatter(logging.Formatter(FILE_FORMAT))
+            handlers.append(file_handler)
+        except OSError as e:
+            file_error = f"Can't open log file {path}: {e}"
+    for handler in handlers:
+        handler.addFilter(_ShortNameFilter())
+
+    with _lock:
+        if _listener is not None:
+            _listener.stop()  # flushes what the old handlers still had queued
+        log_queue = queue.SimpleQueue()
+        _listener = logging.handlers.QueueListener(log_queue, *handlers, respect_handler_level=True)
+        _listener.start()
+
+        root = logging.getLogger(ROOT)
+        for handler in root.handlers[:]:
+            root.removeHandler(handler)
+        root.addHandler(logging.handlers.QueueHandler(log_queue))
+        root.setLevel(getattr(logging, str(log_settings.get("level", "INFO")).upper(), logging.INFO))
+        root.propagate = False
+        _debug_filter.interval = log_settings.get("debug_interval", 1.0)
+    if file_error:
+        logging.getLogger(f"{ROOT}.log").warning(file_error)
+
+
+def _ensure_setup():
+    if _listener is None:
+        setup_logging()
+
+
+def get_logger(name):
+    _ensure_setup()
+    return logging.getLogger(f"{ROOT}.{name}")
+
+
+def get_debug_logger(name):
+    """Rate-limited DEBUG channel for per-frame/per-tick messages"""
+    _ensure_setup()
+    logger = logging.getLogger(f"{ROOT}.{name}.debug")
+    if _debug_filter not in logger.filters:
+        logger.addFilter(_debug_filter)
+    return logger
+
+
+def get_log_stats():
+    return {"debug_suppressed": _debug_filter.suppressed}
+
+
+@atexit.register
+def shutdown_logging():
+    """Write out queued records (runs at exit)"""
+    global _listener
+    with _lock:
+        if _listener is not None:
+            _listener.stop()
+            _listener = None
@@ -5,6 +5,11 @@ import time
 import ctypes
 from ctypes import wintypes
 
+from log import get_logger, get_debug_logger
+
+log = get_logger("macro")
+debug_log = get_debug_logger("macro")
+
 # Windows API for mouse and keyboard
 user32 = ctypes.windll.user32
 
@@ -139,10 +144,14 @@ class MacroController:
             "close_menu": get_macro_button("close_menu"),
         }
     
-    def update_status(self, status):
+    def update_status(self, status, tick=False):
+        """Report a status change; tick=True for the per-second countdown (debug log only)"""
         if self.on_status_change:
             self.on_status_change(status)
-        print(f"[macro] {status}")
+        if tick:
+            debug_log.debug("%s", status)
+        else:
+            log.info("%s", status)
     
     def check_stop_hotkey(self):
         """Check if F6 or Escape is pressed to stop macro"""
@@ -206,35 +215,35 @@ class MacroController:
             # Click Inventory
             self.update_status("Clicking Inventory...")
             inv_pos = self.buttons["inventory"]
-            print(f"[test] Inventory: {inv_pos}")
+            log.info("Test Inventory: %s", inv_pos)
             click_at(inv_pos["x"], inv_pos["y"])
             time.sleep(0.8)
             
             # Click Sell tab
             self.update_status("Clicking Sell Tab...")
             sell_tab_pos = self.buttons["sell_tab"]
-            print(f"[test] Sell Tab: {sell_tab_pos}")
+            log.info("Test Sell Tab: %s", sell_tab_pos)
             click_at(sell_tab_pos["x"], sell_tab_pos["y"])
             time.sleep(0.6)
             
             # Click Select All
             self.update_status("Clicking Select All...")
             select_pos = self.buttons["select_all"]
-            print(f"[test] Select All: {select_pos}")
+            log.info("Test Select All: %s", select_pos)
             click_at(select_pos["x"], select_pos["y"])
             time.sleep(0.5)
             
             # Click Accept
             self.update_status("Clicking Accept...")
             accept_pos = self.buttons["accept"]
-            print(f"[test] Accept: {accept_pos}")
+            log.info("Test Accept: %s", accept_pos)
             click_at(accept_pos["x"], accept_pos["y"])
             time.sleep(0.6)
             
             # Click X to close menu
             self.update_status("Clicking Close (X)...")
             close_pos = self.buttons["close_menu"]
-            print(f"[test] Close: {close_pos}")
+            log.info("Test Close: %s", close_pos)
             click_at(close_pos["x"], close_pos["y"])
             time.sleep(0.3)
             
@@ -301,7 +310,7 @@ class MacroController:
                     remaining = hold_seconds - elapsed
                     mins = remaining // 60
                     secs = remaining % 60
-                    self.update_status(f"Cycle {cycle}: {mins}:{secs:02d}")
+                    self.update_status(f"Cycle {cycle}: {mins}:{secs:02d}", tick=True)
                 
                 # Release click
                 user32.mouse_event(MOUSEEVENTF_LEFTUP, 0, 0, 0, 0)
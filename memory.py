@@ -0,0 +1,114 @@
+"""Process memory readings and the idle OCR-model unloading policy
+
+The EasyOCR weights cost hundreds of MB whether or not anything is being
+scanned. ReaderMemoryManager decides when the app may drop them: after
+unload_after seconds without the forge UI, or sooner (after MIN_IDLE) once
+the process tree uses more than memory_budget_mb. The app only acts on it
+while the forge can still be noticed without OCR (a trained pixel UI
+detector or window locator), and reloads the model in the background as
+soon as one of those sees the forge again.
+"""
+
+import os
+import sys
+import time
+
+MIN_IDLE = 30.0   # s without the forge UI before the memory budget can unload
+
+
+def rss_mb(pid=None):
+    """Resident memory of a process (default: this one) in MB, or None if unknown"""
+    try:
+        import psutil
+        return psutil.Process(pid).memory_info().rss / 2**20
+    except ImportError:
+        pass
+    except Exception:
+        return None
+    if sys.platform == "win32":
+        return _windows_rss_mb(pid)
+    try:
+        with open(f"/proc/{pid or 'self'}/statm") as f:
+            resident_pages = int(f.read().split()[1])
+        return resident_pages * os.sysconf("SC_PAGE_SIZE") / 2**20
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+def _windows_rss_mb(pid):
+    import ctypes
+    from ctypes import wintypes
+
+    class PROCESS_MEMORY_COUNTERS(ctypes.Structure):
+        _fields_ = [
+            ("cb", wintypes.DWORD),
+            ("PageFaultCount", wintypes.DWORD),
+            ("PeakWorkingSetSize", ctypes.c_size_t),
+            ("WorkingSetSize", ctypes.c_size_t),
+            ("QuotaPeakPagedPoolUsage", ctypes.c_size_t),
+            ("QuotaPagedPoolUsage", ctypes.c_size_t),
+            ("QuotaPeakNonPagedPoolUsage", ctypes.c_size_t),
+            ("QuotaNonPagedPoolUsage", ctypes.c_size_t),
+            ("PagefileUsage", ctypes.c_size_t),
+            ("PeakPagefileUsage", ctypes.c_size_t),
+        ]
+
+    kernel32 = ctypes.windll.kernel32
+    psapi = ctypes.windll.psapi
+    kernel32.GetCurrentProcess.restype = wintypes.HANDLE
+    kernel32.OpenProcess.restype = wintypes.HANDLE
+    psapi.GetProcessMemoryInfo.argtypes = [wintypes.HANDLE, ctypes.POINTER(PROCESS_MEMORY_COUNTERS), wintypes.DWORD]
+    PROCESS_QUERY_LIMITED_INFORMATION = 0x1000
+    handle = kernel32.GetCurrentProcess() if pid is None else kernel32.OpenProcess(
+        PROCESS_QUERY_LIMITED_INFORMATION, False, pid)
+    if not handle:
+        return None
+    try:
+        counters = PROCESS_MEMORY_COUNTERS()
+        counters.cb = ctypes.sizeof(counters)
+        if not psapi.GetProcessMemoryInfo(handle, ctypes.byref(counters), counters.cb):
+            return None
+        return counters.WorkingSetSize / 2**20
+    finally:
+        if pid is not None:
+            kernel32.CloseHandle(handle)
+
+
+class ReaderMemoryManager:
+    """Tracks forge-UI idle time and says when the OCR model may be unloaded"""
+
+    def __init__(self, unload_after=300.0, memory_budget_mb=0):
+        self.unload_after = unload_after          # s without the forge UI (0 = never)
+        self.memory_budget_mb = memory_budget_mb  # process-tree RSS cap (0 = none)
+        self.last_forge = time.monotonic()
+        self.unloads = 0
+        self.reloads = 0
+
+    def note_forge(self, visible):
+        if visible:
+            self.last_forge = time.monotonic()
+
+    def idle_time(self):
+        return time.monotonic() - self.last_forge
+
+    def should_unload(self, total_mb=None):
+        """True if the model has been idle long enough, or is idle and over budget"""
+        idle = self.idle_time()
+        if self.unload_after > 0 and idle >= self.unload_after:
+            return True
+        return (self.memory_budget_mb > 0 and idle >= MIN_IDLE
+                and total_mb is not None and total_mb > self.memory_budget_mb)
+
+    def record_unload(self):
+        self.unloads += 1
+
+    def record_reload(self):
+        self.reloads += 1
+        self.last_forge = time.monotonic()  # give the fresh model a full idle period
+
+    def stats(self):
+        return {
+            "idle_s": self.idle_time(),
+            "unloads": self.unloads,
+            "reloads": self.reloads,
+        }
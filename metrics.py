@@ -0,0 +1,182 @@
+"""Per-stage latency spans with rolling percentiles
+
+Wrap a stage in `with metrics.span("ocr"):` (or record() a duration) and
+its latency joins a rolling window of the last WINDOW samples; percentiles
+are only computed when someone asks (debug frame, dumps), so a span costs
+two perf_counter calls and a locked deque append. count("scans") feeds a
+per-minute rate over the last minute.
+
+Stages recorded by the app:
+    capture     screen grab of the scan region
+    preprocess  preprocess presets (grey, resize, threshold...)
+    ocr         detection + recognition, when the frame gate lets OCR run
+    match       match_ores + forge_ui_state (includes assign)
+    assign      ore/count assignment
+    calculate   calculate_forge for both craft types
+    tk_update   update_results (overlay redraw)
+    end_to_end  capture to overlay updated
+
+dump() writes everything as JSON or Prometheus text for offline analysis.
+"""
+
+import json
+import threading
+import time
+from collections import deque
+from pathlib import Path
+
+import numpy as np
+
+WINDOW = 512           # samples kept per stage
+RATE_WINDOW = 60.0     # s of events behind the per-minute counters
+QUANTILES = (50, 95, 99)
+
+
+class _Span:
+    __slots__ = ("metrics", "name", "start")
+
+    def __init__(self, metrics, name):
+        self.metrics = metrics
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.metrics.record(self.name, time.perf_counter() - self.start)
+
+
+class Metrics:
+    """Rolling latency windows per stage plus per-minute event counters"""
+
+    def __init__(self, window=WINDOW):
+        self.window = window
+        self.enabled = True
+        self.started = time.time()
+        self._samples = {}   # stage -> deque of seconds
+        self._totals = {}    # stage -> [count, sum] since start
+        self._events = {}    # counter -> deque of monotonic timestamps
+        self._counts = {}    # counter -> total since start
+        self._lock = threading.Lock()
+
+    def span(self, name):
+        return _Span(self, name)
+
+    def record(self, name, seconds):
+        if not self.enabled:
+            return
+        with self._lock:
+            samples = self._samples.get(name)
+            if samples is None:
+                samples = self._samples[name] = deque(maxlen=self.window)
+                self._totals[name] = [0, 0.0]
+            samples.append(seconds)
+            totals = self._totals[name]
+            totals[0] += 1
+            totals[1] += seconds
+
+    def count(self, name):
+        if not self.enabled:
+            return
+        now = time.monotonic()
+        with self._lock:
+            events = self._events.setdefault(name, deque())
+            events.append(now)
+            self._counts[name] = self._counts.get(name, 0) + 1
+            while now - events[0] > RATE_WINDOW:
+                events.popleft()
+
+    def per_minute(self, name):
+        now = time.monotonic()
+        with self._lock:
+            recent = sum(1 for t in self._events.get(name, ()) if now - t <= RATE_WINDOW)
+        # Scale up while the app has run for less than a minute
+        elapsed = min(RATE_WINDOW, max(1.0, time.time() - self.started))
+        return recent * 60.0 / elapsed
+
+    def stats(self):
+        """Snapshot of every stage and counter.
+
+        Returns:
+            dict: {"stages": {name: {count, total_s, window, p50_ms, p95_ms, p99_ms, mean_ms}},
+                   "counters": {name: {total, per_minute}}}
+        """
+        with self._lock:
+            snapshot = {name: (np.array(samples, dtype=np.float64) * 1000, *self._totals[name])
+                        for name, samples in self._samples.items()}
+            counter_names = list(self._events)
+        stages = {}
+        for name, (values, count, total) in snapshot.items():
+            entry = {"count": count, "total_s": total, "window": len(values)}
+            if len(values):
+                for q, value in zip(QUANTILES, np.percentile(values, QUANTILES)):
+                    entry[f"p{q}_ms"] = float(value)
+                entry["mean_ms"] = float(values.mean())
+            stages[name] = entry
+        counters = {name: {"total": self._counts.get(name, 0), "per_minute": self.per_minute(name)}
+                    for name in counter_names}
+        return {"stages": stages, "counters": counters}
+
+    def summary(self, names=None):
+        """One-line "stage p50/p95/p99 ms" summary for the debug frame"""
+        stats = self.stats()
+        parts = []
+        for name, entry in stats["stages"].items():
+            if (names is None or name in names) and "p50_ms" in entry:
+                parts.append(f"{name} {entry['p50_ms']:.1f}/{entry['p95_ms']:.1f}/{entry['p99_ms']:.1f}")
+        for name, entry in stats["counters"].items():
+            parts.append(f"{name} {entry['per_minute']:.0f}/min")
+        return " | ".join(parts)
+
+    def to_prometheus(self):
+        """Prometheus text exposition of stats() (stage latencies as summaries, in seconds)"""
+        stats = self.stats()
+        lines = [
+            "# HELP forger_stage_seconds Latency of each scan stage",
+            "# TYPE forger_stage_seconds summary",
+        ]
+        for name, entry in stats["stages"].items():
+            for q in QUANTILES:
+                if f"p{q}_ms" in entry:
+                    lines.append(f'forger_stage_seconds{{stage="{name}",quantile="{q / 100}"}} '
+                                 f'{entry[f"p{q}_ms"] / 1000:.6f}')
+            lines.append(f'forger_stage_seconds_sum{{stage="{name}"}} {entry["total_s"]:.6f}')
+            lines.append(f'forger_stage_seconds_count{{stage="{name}"}} {entry["count"]}')
+        lines += [
+            "# HELP forger_events_total Events since start",
+            "# TYPE forger_events_total counter",
+        ]
+        for name, entry in stats["counters"].items():
+            lines.append(f'forger_events_total{{event="{name}"}} {entry["total"]}')
+        lines += [
+            "# HELP forger_events_per_minute Events over the last minute",
+            "# TYPE forger_events_per_minute gauge",
+        ]
+        for name, entry in stats["counters"].items():
+            lines.append(f'forger_events_per_minute{{event="{name}"}} {entry["per_minute"]:.2f}')
+        return "\n".join(lines) + "\n"
+
+    def dump(self, path):
+        """Write stats to path: Prometheus text for .prom/.txt, JSON otherwise"""
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        if path.suffix in (".prom", ".txt"):
+            path.write_text(self.to_prometheus())
+        else:
+            with open(path, "w") as f:
+                json.dump({"time": time.time(), "uptime_s": time.time() - self.started, **self.stats()},
+                          f, indent=2)
+        return path
+
+    def reset(self):
+        with self._lock:
+            self._samples.clear()
+            self._totals.clear()
+            self._events.clear()
+            self._counts.clear()
+            self.started = time.time()
+
+
+# Process-wide registry used by the scanner, pipeline and app
+metrics = Metrics()
@@ -0,0 +1,98 @@
+"""OCR backend selection (device, CPU threads, quantization)"""
+
+import os
+
+from log import get_logger
+
+log = get_logger("ocr")
+
+
+def cuda_available() -> bool:
+    """True if torch can see a CUDA device"""
+    try:
+        import torch
+        return torch.cuda.is_available()
+    except Exception:
+        return False
+
+
+def default_thread_count() -> int:
+    """Half the cores, capped at 4 - leaves the rest for the game"""
+    cores = os.cpu_count() or 2
+    return max(1, min(4, cores // 2))
+
+
+def resolve_backend(ocr_settings: dict) -> dict:
+    """Turn the "ocr" settings into a concrete backend config.
+    
+    Returns:
+        dict: {"device": "cpu"|"cuda", "threads": int, "quantize": bool}
+    """
+    device = ocr_settings.get("device", "auto")
+    if device == "auto":
+        device = "cuda" if cuda_available() else "cpu"
+    elif device == "cuda" and not cuda_available():
+        log.warning("CUDA requested but not available - using CPU")
+        device = "cpu"
+    
+    threads = ocr_settings.get("threads", 0) or default_thread_count()
+    
+    return {
+        "device": device,
+        "threads": threads,
+        # Quantization only applies to the CPU models
+        "quantize": bool(ocr_settings.get("quantize", True)) and device == "cpu",
+    }
+
+
+def apply_thread_settings(threads: int):
+    """Limit torch's intra-op thread pool so OCR doesn't compete with the game"""
+    try:
+        import torch
+        torch.set_num_threads(threads)
+    except Exception as e:
+        log.warning("Could not set torch threads: %s", e)
+
+
+def describe_backend(backend: dict) -> str:
+    text = f"{backend['device']}"
+    if backend["device"] == "cpu":
+        text += f", {backend['threads']} threads"
+        text += ", int8" if backend["quantize"] else ", fp32"
+    return text
+
+
+def create_reader(backend: dict):
+    """Build an EasyOCR reader for a resolved backend config"""
+    import easyocr
+    
+    if backend["device"] == "cpu":
+        apply_thread_settings(backend["threads"])
+    return easyocr.Reader(
+        ['en'],
+        gpu=backend["device"] == "cuda",
+        quantize=backend["quantize"],
+        verbose=False,
+    )
+
+
+def warm_up(reader):
+    """Run one small synthetic frame so the first real scan doesn't pay warm-up cost"""
+    import numpy as np
+    from PIL import Image, ImageDraw
+    img = Image.new("RGB", (160, 48), (20, 20, 20))
+    ImageDraw.Draw(img).text((8, 16), "Iron Ore x3", fill=(255, 255, 255))
+    reader.readtext(np.array(img))
+
+
+def model_bytes(reader) -> int:
+    """Approximate size of a reader's detector and recognizer weights"""
+    total = 0
+    for name in ("detector", "recognizer"):
+        model = getattr(reader, name, None)
+        if model is None or not hasattr(model, "state_dict"):
+            continue
+        for value in model.state_dict().values():
+            if hasattr(value, "element_size"):
+                total += value.element_size() * value.nelement()
+    return total
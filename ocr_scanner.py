@@ -1,79 +1,631 @@
 """OCR Scanner using EasyOCR"""
 
+import atexit
+import gc
+import hashlib
+import logging
 import re
 import sys
 import os
+import threading
+import time
+from collections import OrderedDict
 sys.path.insert(0, os.path.dirname(__file__))
 
-import easyocr
-import mss
 import numpy as np
-from PIL import Image
 from data import ORES
+from capture import default_session
+from config import get_ocr_settings, get_preprocess_pipeline
+from ocr_backend import resolve_backend, create_reader, describe_backend, warm_up, model_bytes
+from ocr_worker import OCRWorker, RemoteReader
+from template_matcher import TemplateLibrary
+from ore_matcher import match_ore_name, fuzzy_ore_name
+from preprocess import preprocess, map_results, resolve_pipeline, pipeline_key
+from ui_detector import ForgeUIDetector
+from log import get_logger, get_debug_logger
+from metrics import metrics
 
-# Build OCR patterns from ore names
-ORE_PATTERNS = {}
-for ore_name in ORES.keys():
-    name_lower = ore_name.lower()
-    base = name_lower.replace(" ore", "").replace(" crystal", "").strip()
-    
-    ORE_PATTERNS[name_lower] = ore_name
-    ORE_PATTERNS[base] = ore_name
-    ORE_PATTERNS[base.replace(" ", "")] = ore_name
-    
-    if len(base) >= 5:
-        ORE_PATTERNS[base[:5]] = ore_name
-
-# Special patterns for OCR misreads
-ORE_PATTERNS["eye"] = "Eye Ore"
-ORE_PATTERNS["eve"] = "Eye Ore"
-ORE_PATTERNS["eve ore"] = "Eye Ore"
-ORE_PATTERNS["mythri"] = "Mythril Ore"
-ORE_PATTERNS["rival"] = "Rivalite Ore"
-ORE_PATTERNS["topa"] = "Topaz Ore"
-ORE_PATTERNS["magma"] = "Magmaite Ore"
-ORE_PATTERNS["magmai"] = "Magmaite Ore"
-
-# Initialize EasyOCR reader (downloads model on first run)
-print("Loading EasyOCR model...")
-reader = easyocr.Reader(['en'], gpu=True)  # Set gpu=False if no CUDA
-print("EasyOCR ready!")
-
-
-def capture_screen(region=None):
-    """Capture screen or specific region"""
-    with mss.mss() as sct:
-        if region:
-            monitor = {
-                "left": region["x"],
-                "top": region["y"],
-                "width": region["width"],
-                "height": region["height"]
-            }
+log = get_logger("ocr")
+debug_log = get_debug_logger("ocr")
+
+# EasyOCR reader - built lazily on a background thread (downloads model on first run)
+reader = None
+reader_ready = threading.Event()
+reader_load_time = None  # seconds spent building + warming up the reader
+reader_error = None
+reader_backend = None  # resolved device/threads/quantize config
+reader_worker = None  # OCRWorker when OCR runs out of process
+reader_unloaded = False  # unload_reader() dropped the model; ocr_frame skips OCR until a reload
+_reader_lock = threading.Lock()
+_reader_thread = None
+_reader_callbacks = []
+_reader_error_callbacks = []
+
+
+def _load_reader():
+    global reader, reader_load_time, reader_error, reader_backend, _reader_thread, reader_worker
+    start = time.perf_counter()
+    try:
+        ocr_settings = get_ocr_settings()
+        if ocr_settings.get("worker_process", True):
+            log.info("Starting OCR worker process...")
+            worker = OCRWorker(ocr_settings)
+            backend = worker.start()
+            new_reader = RemoteReader(worker)
         else:
-            # Primary monitor
-            monitor = sct.monitors[1]
+            worker = None
+            backend = resolve_backend(ocr_settings)
+            log.info("Loading EasyOCR model (%s)...", describe_backend(backend))
+            new_reader = create_reader(backend)
+            warm_up(new_reader)
+        _init_templates()
+    except Exception as e:
+        log.error("Model load error: %s", e)
+        with _reader_lock:
+            reader_error = str(e)
+            _reader_thread = None  # allow a retry on the next request
+            callbacks = _reader_error_callbacks[:]
+            _reader_error_callbacks.clear()
+            _reader_callbacks.clear()  # a retry registers its own
+        for callback in callbacks:
+            callback(reader_error)
+        return
+    reader_load_time = time.perf_counter() - start
+    log.info("EasyOCR ready in %.2fs (%s%s)", reader_load_time, describe_backend(backend),
+             ", worker process" if worker else "")
+    
+    with _reader_lock:
+        reader = new_reader
+        reader_worker = worker
+        reader_backend = backend
+        reader_ready.set()
+        callbacks = _reader_callbacks[:]
+        _reader_callbacks.clear()
+        _reader_error_callbacks.clear()
+    for callback in callbacks:
+        callback()
+
+
+def load_reader_async(on_ready=None, on_error=None):
+    """Start building the reader in the background (no-op if already started).
+    
+    on_ready is called from the loader thread once the reader is usable, or
+    immediately if it already is. If loading fails, on_error(message) is
+    called from the loader thread instead; call again to retry.
+    """
+    global _reader_thread, reader_error, reader_unloaded
+    with _reader_lock:
+        reader_unloaded = False
+        if reader_ready.is_set():
+            run_now = True
+        else:
+            run_now = False
+            if on_ready:
+                _reader_callbacks.append(on_ready)
+            if on_error:
+                _reader_error_callbacks.append(on_error)
+            if _reader_thread is None:
+                reader_error = None
+                _reader_thread = threading.Thread(target=_load_reader, daemon=True)
+                _reader_thread.start()
+    if run_now and on_ready:
+        on_ready()
+
+
+def is_reader_ready():
+    return reader_ready.is_set()
+
+
+def get_reader():
+    """Return the EasyOCR reader, waiting for the background load if needed"""
+    if not reader_ready.is_set():
+        load_reader_async()
+        while not reader_ready.wait(0.5):
+            if reader_error:
+                raise RuntimeError(f"OCR model failed to load: {reader_error}")
+    return reader
+
+
+def shutdown_reader():
+    """Stop the OCR worker process (if any); call when the app closes"""
+    global reader, reader_worker, _reader_thread
+    with _reader_lock:
+        worker, reader_worker = reader_worker, None
+        if worker is not None:
+            reader = None
+            reader_ready.clear()
+            _reader_thread = None
+    if worker is not None:
+        worker.shutdown()
+
+
+atexit.register(shutdown_reader)  # scripts that never call it still free the worker
+
+
+def unload_reader():
+    """Drop the loaded OCR model to free its memory.
+    
+    The worker process (if any) is stopped; an in-process reader is released
+    to the garbage collector. Until load_reader_async is called, ocr_frame
+    skips OCR rather than loading it again (get_reader still loads it).
+    
+    Returns:
+        bool: True if a loaded reader was dropped
+    """
+    global reader, reader_worker, _reader_thread, reader_unloaded
+    with _reader_lock:
+        if not reader_ready.is_set():
+            return False
+        reader_unloaded = True
+        old_reader, worker = reader, reader_worker
+        reader = None
+        reader_worker = None
+        reader_ready.clear()
+        _reader_thread = None
+    if worker is not None:
+        worker.shutdown()  # waits for an OCR call in flight
+    else:
+        del old_reader
+        gc.collect()
+        try:
+            import torch
+            if torch.cuda.is_available():
+                torch.cuda.empty_cache()
+        except ImportError:
+            pass
+    log.info("OCR model unloaded")
+    return True
+
+
+def get_reader_memory():
+    """Memory use of the app and the OCR model, in MB (None when unknown).
+    
+    Returns:
+        dict: {rss_mb, model_mb, total_mb} - total adds the OCR worker process;
+        model_mb is the worker's RSS, or the in-process weights' size
+    """
+    from memory import rss_mb
+    rss = rss_mb()
+    with _reader_lock:
+        worker, current = reader_worker, reader
+    if worker is not None:
+        pid = worker.pid
+        model = rss_mb(pid) if pid else None
+        total = rss + model if rss is not None and model is not None else rss
+    else:
+        model = model_bytes(current) / 2**20 if current is not None else 0.0
+        total = rss
+    return {"rss_mb": rss, "model_mb": model, "total_mb": total}
+
+
+# Frame-change gating: the signature is a small grid of block-averaged grey
+# levels. If no cell moved more than the threshold since the last OCR of the
+# same region, the cached OCR result is reused instead of calling readtext.
+GATE_GRID = (32, 32)  # (cols, rows) of the downsampled signature
+
+
+def _grid_edges(h, w):
+    """Start offsets of the signature cells for a (half-resolution) h x w image"""
+    cols, rows = GATE_GRID
+    row_edges = np.linspace(0, h, min(rows, h) + 1).astype(int)[:-1]
+    col_edges = np.linspace(0, w, min(cols, w) + 1).astype(int)[:-1]
+    return row_edges, col_edges
+
+
+def frame_signature(img):
+    """Downsample a capture to a GATE_GRID grid of mean grey levels"""
+    # Every other pixel is plenty for block means and halves the work
+    grey = img[::2, ::2]
+    grey = grey.mean(axis=2, dtype=np.float32) if grey.ndim == 3 else grey.astype(np.float32)
+    h, w = grey.shape
+    row_edges, col_edges = _grid_edges(h, w)
+    sums = np.add.reduceat(np.add.reduceat(grey, row_edges, axis=0), col_edges, axis=1)
+    counts = np.outer(np.diff(np.append(row_edges, h)), np.diff(np.append(col_edges, w)))
+    return sums / counts
+
+
+class FrameGate:
+    """Reuses the last OCR result of a region while its pixels stay unchanged"""
+    
+    def __init__(self, threshold):
+        self.threshold = threshold
+        self.hits = 0
+        self.misses = 0
+        self.last_diff = None
+        self._entries = {}  # region key -> (signature, ocr results)
+        self._lock = threading.Lock()
+    
+    def lookup(self, key, signature):
+        """Compare a frame with the last OCR'd frame of the same region.
         
-        screenshot = sct.grab(monitor)
-        img = Image.frombytes("RGB", screenshot.size, screenshot.bgra, "raw", "BGRX")
-        return np.array(img)
+        Returns:
+            tuple: (cached_results, changed_cells)
+            - cached_results: OCR results to reuse, or None if OCR must run
+            - changed_cells: bool grid of cells that moved past the threshold
+              (None when there is no previous frame to compare with)
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0].shape != signature.shape:
+                self.misses += 1
+                return None, None
+            
+            cell_diff = np.abs(signature - entry[0])
+            self.last_diff = float(cell_diff.max())
+            if self.last_diff <= self.threshold:
+                self.hits += 1
+                return entry[1], None
+            self.misses += 1
+            return None, cell_diff > self.threshold
+    
+    def store(self, key, signature, results):
+        with self._lock:
+            self._entries[key] = (signature, results)
+    
+    def invalidate(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+    
+    def reset(self):
+        """Drop cached results and counters"""
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+            self.last_diff = None
+    
+    def stats(self):
+        total = self.hits + self.misses
+        return {
+            "threshold": self.threshold,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0,
+            "last_diff": self.last_diff,
+        }
 
 
-def detect_forge_ui(region=None):
-    """Check if the Forge UI is currently visible on screen.
+frame_gate = FrameGate(get_ocr_settings().get("diff_threshold", 6.0))
+
+
+def get_gate_stats():
+    """Hit/miss counters of the OCR frame gate"""
+    return frame_gate.stats()
+
+
+# Text-box layout cache: the forge slots don't move once the UI is open, so
+# EasyOCR's CRAFT detector runs once and later scans only recognize the cached
+# boxes. Boxes are padded by BOX_PAD of their height before they're mapped to
+# signature cells. A change in a cell outside every padded box means text
+# appeared or moved; a change in a box's left or right edge cells means its
+# label may have grown or shrunk (x1 -> x12). Either way the layout is
+# detected again - only changes strictly inside a box reuse it.
+BOX_PAD = 0.25
+
+
+class LayoutCache:
+    """Detected text boxes per region, reused until the layout changes"""
+    
+    def __init__(self):
+        self.detections = 0
+        self.reuses = 0
+        self._layouts = {}  # region key -> layout dict
+        self._lock = threading.Lock()
+    
+    def get(self, key, changed_cells):
+        """Return the cached layout if every changed cell lies inside a known box"""
+        with self._lock:
+            layout = self._layouts.get(key)
+            if layout is None or changed_cells is None:
+                return None
+            if layout["coverage"].shape != changed_cells.shape:
+                return None
+            if np.any(changed_cells & (layout["edges"] | ~layout["coverage"])):
+                return None
+            self.reuses += 1
+            return layout
+    
+    def store(self, key, horizontal_list, free_list, img_shape):
+        h, w = img_shape[:2]
+        rects = [tuple(box) for box in horizontal_list]
+        for quad in free_list:
+            xs = [p[0] for p in quad]
+            ys = [p[1] for p in quad]
+            rects.append((min(xs), max(xs), min(ys), max(ys)))
+        
+        coverage, edges = _box_coverage(rects, h, w)
+        layout = {
+            "horizontal": horizontal_list,
+            "free": free_list,
+            "coverage": coverage,
+            "edges": edges,
+        }
+        with self._lock:
+            self._layouts[key] = layout
+            self.detections += 1
+        return layout
+    
+    def invalidate(self, key=None):
+        with self._lock:
+            if key is None:
+                self._layouts.clear()
+            else:
+                self._layouts.pop(key, None)
+    
+    def stats(self):
+        return {"detections": self.detections, "reuses": self.reuses}
+
+
+def _box_coverage(rects, h, w):
+    """Signature cells of (x_min, x_max, y_min, y_max) rects, padded by BOX_PAD.
     
     Returns:
-        tuple: (is_forge_ui, has_ores_placed, raw_text)
-        - is_forge_ui: True if forge UI is detected
-        - has_ores_placed: True if at least one ore is in the slots (not all "Empty")
-        - raw_text: The raw OCR text for debugging
+        tuple: (coverage, edges) bool grids - every cell a padded box overlaps,
+        and the cells from each box's left/right edge out to its padding
     """
-    img = capture_screen(region)
+    # Signature cells are laid out on the half-resolution image
+    half_h, half_w = (h + 1) // 2, (w + 1) // 2
+    row_edges, col_edges = _grid_edges(half_h, half_w)
+    coverage = np.zeros((len(row_edges), len(col_edges)), dtype=bool)
+    edges = np.zeros_like(coverage)
     
-    # Quick OCR scan
-    results = reader.readtext(img)
-    raw_text = " ".join([text for _, text, _ in results]).lower()
+    def cell(edges_, pos):
+        return max(0, np.searchsorted(edges_, pos / 2, side="right") - 1)
     
+    for x_min, x_max, y_min, y_max in rects:
+        pad = (y_max - y_min) * BOX_PAD
+        c0, c1 = cell(col_edges, x_min - pad), cell(col_edges, x_max + pad)
+        r0, r1 = cell(row_edges, y_min - pad), cell(row_edges, y_max + pad)
+        coverage[r0:r1 + 1, c0:c1 + 1] = True
+        edges[r0:r1 + 1, c0:cell(col_edges, x_min) + 1] = True
+        edges[r0:r1 + 1, cell(col_edges, x_max):c1 + 1] = True
+    return coverage, edges
+
+
+layout_cache = LayoutCache()
+
+
+def get_layout_stats():
+    """How often the text detector ran vs. cached boxes were reused"""
+    return layout_cache.stats()
+
+
+def _region_key(region):
+    if not region:
+        return None
+    return (region["x"], region["y"], region["width"], region["height"])
+
+
+# Template fast path: crops that match a known label confidently skip the
+# neural recognizer; the rest go to EasyOCR, whose confident reads are
+# learned as new templates.
+SAMPLE_MIN_CONF = 0.9
+templates = None  # TemplateLibrary, built with the reader
+
+
+def _init_templates():
+    global templates
+    ocr_settings = get_ocr_settings()
+    if not ocr_settings.get("templates", True) or templates is not None:
+        return
+    library = TemplateLibrary(ocr_settings.get("template_threshold", 0.92))
+    library.add_catalog()
+    library.load()
+    templates = library
+
+
+def get_template_stats():
+    """Template library size and match hit/miss counters"""
+    if templates is None:
+        return {"templates": 0, "samples": 0, "hits": 0, "misses": 0, "hit_rate": 0.0}
+    return templates.stats()
+
+
+def _box_points(box):
+    x_min, x_max, y_min, y_max = box
+    return [[x_min, y_min], [x_max, y_min], [x_max, y_max], [x_min, y_max]]
+
+
+def _crop(img, x_min, x_max, y_min, y_max):
+    x_min, x_max, y_min, y_max = (max(0, int(v)) for v in (x_min, x_max, y_min, y_max))
+    return img[y_min:y_max, x_min:x_max]
+
+
+# Per-tile recognition cache: recognized text keyed by a hash of the box's
+# pixels, so when one slot changes only that slot's boxes are recognized again.
+
+
+def tile_key(crop):
+    """Fast content hash of a text crop"""
+    return crop.shape, hashlib.blake2b(np.ascontiguousarray(crop).data, digest_size=16).digest()
+
+
+class TileCache:
+    """LRU cache of (text, confidence) per crop hash"""
+    
+    def __init__(self, capacity):
+        self.capacity = capacity
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+    
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry
+    
+    def put(self, key, text, conf):
+        if self.capacity <= 0:
+            return
+        with self._lock:
+            self._entries[key] = (text, conf)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.capacity:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+    
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+    
+    def stats(self):
+        total = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "capacity": self.capacity,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": self.hits / total if total else 0.0,
+        }
+
+
+tile_cache = TileCache(get_ocr_settings().get("tile_cache_size", 256))
+
+
+def get_tile_stats():
+    """Size, hit rate and evictions of the per-tile recognition cache"""
+    return tile_cache.stats()
+
+
+def recognize_boxes(ocr, img, layout):
+    """Recognize the layout's boxes: cached tiles first, then templates, then EasyOCR"""
+    results = []
+    pending = []
+    for box in layout["horizontal"]:
+        crop = _crop(img, *box)
+        key = tile_key(crop)
+        cached = tile_cache.get(key)
+        if cached is not None:
+            results.append((_box_points(box), *cached))
+            continue
+        label, score = templates.match(crop) if templates else (None, 0.0)
+        if label is not None:
+            results.append((_box_points(box), label, score))
+            tile_cache.put(key, label, score)
+        else:
+            pending.append(box)
+    
+    if pending or layout["free"]:
+        recognized = ocr.recognize(img, horizontal_list=pending, free_list=layout["free"])
+        results.extend(recognized)
+        _cache_tiles(img, recognized)
+        if templates:
+            _learn_templates(img, recognized)
+    return results
+
+
+def _cache_tiles(img, recognized):
+    # Keyed by the pixels under each returned box, which for horizontal boxes
+    # is exactly the crop recognize_boxes looks up next time
+    for bbox, text, conf in recognized:
+        xs = [p[0] for p in bbox]
+        ys = [p[1] for p in bbox]
+        tile_cache.put(tile_key(_crop(img, min(xs), max(xs), min(ys), max(ys))), text, conf)
+
+
+def _learn_templates(img, recognized):
+    for bbox, text, conf in recognized:
+        if conf < SAMPLE_MIN_CONF or not text.strip():
+            continue
+        xs = [p[0] for p in bbox]
+        ys = [p[1] for p in bbox]
+        templates.add_sample(text.strip(), _crop(img, min(xs), max(xs), min(ys), max(ys)))
+    if templates.dirty:
+        templates.save()
+
+
+# Preprocessing preset per region name (read once each; see preprocess.PRESETS)
+_region_pipelines = {}
+
+
+def region_pipeline(region_name):
+    """The configured preprocess preset of a region ("forge_slots", "ores_panel"...)"""
+    pipeline = _region_pipelines.get(region_name)
+    if pipeline is None:
+        pipeline = _region_pipelines[region_name] = get_preprocess_pipeline(region_name)
+    return pipeline
+
+# Per region + pipeline: text height (source px) measured by the first
+# detection, and the resize scale in use. The scale only changes once, when
+# the text height is learned, and then cached boxes/results are dropped.
+_text_heights = {}
+_scales = {}
+
+
+def _median_box_height(horizontal_list):
+    heights = [y_max - y_min for _, _, y_min, y_max in horizontal_list]
+    return float(np.median(heights)) if heights else None
+
+
+def read_text(img, region=None, pipeline=None, region_name="forge_slots"):
+    """Run OCR on a capture, skipping it when the region hasn't changed.
+    
+    Equivalent to reader.readtext, but the text detector only runs when the
+    box layout changed; otherwise just the recognizer runs on cached boxes,
+    and boxes that match a known template skip the recognizer too.
+    
+    pipeline is a preprocess preset name or stage dict (default: the preset
+    configured for region_name). Boxes are returned in capture pixels.
+    """
+    if pipeline is None:
+        pipeline = region_pipeline(region_name)
+    steps = resolve_pipeline(pipeline)
+    key = (_region_key(region), pipeline_key(steps))
+    
+    with metrics.span("preprocess"):
+        img, transform = preprocess(img, steps, _text_heights.get(key))
+    scale = transform[3]
+    if _scales.get(key, scale) != scale:
+        layout_cache.invalidate(key)
+        frame_gate.invalidate(key)
+    _scales[key] = scale
+    
+    signature = frame_signature(img)
+    cached, changed_cells = frame_gate.lookup(key, signature)
+    if cached is not None:
+        return cached
+    
+    ocr = get_reader()
+    with metrics.span("ocr"):
+        layout = layout_cache.get(key, changed_cells)
+        if layout is None:
+            horizontal_list, free_list = ocr.detect(img)
+            layout = layout_cache.store(key, horizontal_list[0], free_list[0], img.shape)
+            text_height = _median_box_height(horizontal_list[0])
+            if text_height and key not in _text_heights:
+                _text_heights[key] = text_height / scale
+        
+        results = map_results(recognize_boxes(ocr, img, layout), transform)
+    metrics.count("ocr_runs")
+    frame_gate.store(key, signature, results)
+    return results
+
+
+def capture_screen(region=None, source=None):
+    """Capture screen or specific region.
+    
+    source is any capture.CaptureSource (live screen, PNG folder, recording);
+    the shared screen CaptureSession is used unless one is given. The returned
+    array may be reused by the source on the next capture - copy it to keep it.
+    """
+    with metrics.span("capture"):
+        return (source or default_session).grab(region)
+
+
+def forge_ui_state(raw_text):
+    """Work out Forge UI visibility from lowercased OCR text.
+    
+    Returns:
+        tuple: (is_forge_ui, has_ores_placed)
+    """
     # Look for "Empty" slots
     empty_count = raw_text.count("empty")
     
@@ -105,18 +657,106 @@ def detect_forge_ui(region=None):
     # - OR we have fewer than 4 empty slots (some are filled)
     has_ores_placed = ore_count_pattern or (is_forge_ui and empty_count < 4)
     
-    print(f"[detect] Forge UI: {is_forge_ui} | Empty: {empty_count} | Ores: {has_ores_placed} | Indicators: {indicator_matches} | OrePattern: {ore_count_pattern}")
-    return is_forge_ui, has_ores_placed, raw_text
+    debug_log.debug("Forge UI: %s | Empty: %d | Ores: %s | Indicators: %d | OrePattern: %s",
+                    is_forge_ui, empty_count, has_ores_placed, indicator_matches, ore_count_pattern)
+    return is_forge_ui, has_ores_placed
 
 
-def scan_for_ores(region=None):
-    """Capture screen and detect ores using OCR"""
-    # Capture screen
-    img = capture_screen(region)
+# Geometry of a forge slot: the "x<count>" label sits below the ore name
+COUNT_MAX_DY = 80
+COUNT_MAX_DX = 60
+NO_PAIR_COST = 1e6  # cost of an infeasible ore/count pair
+
+
+def solve_assignment(cost):
+    """Minimum-cost assignment (Hungarian algorithm with potentials).
     
-    # Run OCR - get bounding boxes too for position-based matching
-    results = reader.readtext(img)
+    Works on any rectangular cost matrix; every row of the smaller side gets
+    a distinct column. Returns a list of (row, col) pairs.
+    """
+    cost = np.asarray(cost, dtype=np.float64)
+    transposed = cost.shape[0] > cost.shape[1]
+    if transposed:
+        cost = cost.T
+    n, m = cost.shape
+    if n == 0:
+        return []
+    
+    u = np.zeros(n + 1)
+    v = np.zeros(m + 1)
+    p = np.zeros(m + 1, dtype=int)    # p[j]: row (1-based) assigned to column j
+    way = np.zeros(m + 1, dtype=int)
+    for i in range(1, n + 1):
+        p[0] = i
+        j0 = 0
+        minv = np.full(m + 1, np.inf)
+        used = np.zeros(m + 1, dtype=bool)
+        while True:
+            used[j0] = True
+            i0 = p[j0]
+            free = ~used[1:]
+            reduced = cost[i0 - 1] - u[i0] - v[1:]
+            better = free & (reduced < minv[1:])
+            minv[1:][better] = reduced[better]
+            way[1:][better] = j0
+            candidates = np.where(free, minv[1:], np.inf)
+            j1 = int(candidates.argmin()) + 1
+            delta = candidates[j1 - 1]
+            u[p[used]] += delta
+            v[used] -= delta
+            minv[1:][free] -= delta
+            j0 = j1
+            if p[j0] == 0:
+                break
+        # Augment along the alternating path
+        while j0:
+            j1 = way[j0]
+            p[j0] = p[j1]
+            j0 = j1
+    
+    pairs = [(p[j] - 1, j - 1) for j in range(1, m + 1) if p[j]]
+    if transposed:
+        pairs = [(col, row) for row, col in pairs]
+    return pairs
+
+
+def count_cost_matrix(ore_items, count_items):
+    """Distance from each ore name to each count label (NO_PAIR_COST where impossible)"""
+    ore_xy = np.array([[o["x"], o["y"]] for o in ore_items], dtype=np.float64).reshape(-1, 2)
+    count_xy = np.array([[c["x"], c["y"]] for c in count_items], dtype=np.float64).reshape(-1, 2)
+    dx = np.abs(count_xy[None, :, 0] - ore_xy[:, None, 0])
+    dy = count_xy[None, :, 1] - ore_xy[:, None, 1]  # Positive = below
+    feasible = (dy > 0) & (dy < COUNT_MAX_DY) & (dx < COUNT_MAX_DX)
+    return np.where(feasible, dx + dy * 0.5, NO_PAIR_COST)  # Prefer horizontally aligned
+
+
+def assign_counts(ore_items, count_items):
+    """Globally optimal ore -> count pairing. Returns {ore index: count index}."""
+    if not ore_items or not count_items:
+        return {}
+    cost = count_cost_matrix(ore_items, count_items)
+    return {i: j for i, j in solve_assignment(cost) if cost[i, j] < NO_PAIR_COST}
+
+
+def _merge_split_reads(ore_items):
+    """Drop repeat reads of the same ore within one slot (e.g. "Lapis" + "Lazuli Ore")"""
+    merged = []
+    for ore in ore_items:
+        if any(o["ore_name"] == ore["ore_name"]
+               and abs(o["x"] - ore["x"]) < COUNT_MAX_DX
+               and abs(o["y"] - ore["y"]) < COUNT_MAX_DY / 2
+               for o in merged):
+            continue
+        merged.append(ore)
+    return merged
+
+
+def match_ores(results):
+    """Turn OCR results (with bounding boxes) into the detected ores dict.
     
+    Returns:
+        tuple: (detected, raw_text)
+    """
     # Build list of detected text with positions
     text_items = []
     for bbox, text, conf in results:
@@ -131,29 +771,16 @@ def scan_for_ores(region=None):
         })
     
     raw_text = " ".join([item["text"] for item in text_items])
-    print(f"OCR Text: {raw_text}")
-    print(f"Items with positions: {[(i['text'], i['x'], i['y']) for i in text_items]}")
     
     # First pass: find all ore names and their positions
     ore_items = []
     for item in text_items:
-        text_lower = item["text"].lower().strip()
-        
-        # Find the BEST (longest) matching pattern
-        best_match = None
-        best_match_len = 0
-        
-        for pattern, ore_id in ORE_PATTERNS.items():
-            if pattern in text_lower:
-                # Prefer longer pattern matches (magmaite > aite)
-                if len(pattern) > best_match_len:
-                    best_match = ore_id
-                    best_match_len = len(pattern)
-            elif text_lower in pattern and len(text_lower) >= 4:
-                # OCR text is substring of pattern (partial read)
-                if len(text_lower) > best_match_len:
-                    best_match = ore_id
-                    best_match_len = len(text_lower)
+        # Find the BEST (longest) matching pattern (magmaite > aite),
+        # or the pattern the text is a partial read of
+        best_match, _ = match_ore_name(item["text"])
+        if not best_match:
+            # OCR misread - take the closest ore name if it's unambiguous
+            best_match, _ = fuzzy_ore_name(item["text"])
         
         if best_match:
             ore_items.append({
@@ -162,7 +789,6 @@ def scan_for_ores(region=None):
                 "y": item["y"],
                 "text": item["text"]
             })
-            print(f"Matched '{item['text']}' -> {best_match} (len={best_match_len})")
     
     # Second pass: find all count patterns (x#)
     count_items = []
@@ -176,57 +802,166 @@ def scan_for_ores(region=None):
                     "count": count,
                     "x": item["x"],
                     "y": item["y"],
-                    "text": item["text"],
-                    "used": False
+                    "text": item["text"]
                 })
     
-    print(f"Ore items: {[(o['ore_name'], o['x']) for o in ore_items]}")
-    print(f"Count items: {[(c['count'], c['x']) for c in count_items]}")
+    # Pair ores with counts as one global assignment (count must be below
+    # the name and horizontally close), then sum counts of ores that
+    # occupy more than one slot
+    ore_items = _merge_split_reads(ore_items)
+    with metrics.span("assign"):
+        pairs = assign_counts(ore_items, count_items)
+    
+    slot_counts = {}  # ore_name -> count per slot (None = no count label found)
+    for i, ore in enumerate(ore_items):
+        j = pairs.get(i)
+        slot_counts.setdefault(ore["ore_name"], []).append(count_items[j]["count"] if j is not None else None)
     
-    # Match each ore with its closest count (must be below and horizontally close)
     detected = {}
-    for ore in ore_items:
-        ore_name = ore["ore_name"]
-        if ore_name in detected:
-            continue
-        
-        best_count = 1
-        best_count_item = None
-        best_distance = float('inf')
-        
-        for count_item in count_items:
-            if count_item["used"]:
-                continue
-            
-            dx = abs(count_item["x"] - ore["x"])
-            dy = count_item["y"] - ore["y"]  # Positive = below
-            
-            # Count must be below the ore name (dy > 0) and horizontally close
-            if dy > 0 and dy < 80 and dx < 60:
-                distance = dx + dy * 0.5  # Prefer horizontally aligned
-                
-                if distance < best_distance:
-                    best_distance = distance
-                    best_count = count_item["count"]
-                    best_count_item = count_item
-        
-        # Mark this count as used so it's not assigned to another ore
-        if best_count_item:
-            best_count_item["used"] = True
-        
+    for ore_name, counts in slot_counts.items():
         ore_data = ORES.get(ore_name)
-        if ore_data:
-            detected[ore_name] = {
-                "name": ore_name,
-                "count": best_count,
-                "rarity": ore_data["rarity"],
-                "multiplier": ore_data["multiplier"]
-            }
-            print(f"Found: {ore_name} x{best_count} (ore_x={ore['x']:.0f})")
+        if not ore_data:
+            continue
+        labelled = [c for c in counts if c is not None]
+        count = sum(labelled) if labelled else 1
+        detected[ore_name] = {
+            "name": ore_name,
+            "count": count,
+            "rarity": ore_data["rarity"],
+            "multiplier": ore_data["multiplier"]
+        }
+    
+    # One record per scan, built only when debug logging is on
+    if debug_log.isEnabledFor(logging.DEBUG):
+        debug_log.debug("OCR text: %s | items: %s | ores: %s | counts: %s | found: %s", raw_text,
+                        [(i["text"], round(i["x"]), round(i["y"])) for i in text_items],
+                        [(o["text"], o["ore_name"], round(o["x"])) for o in ore_items],
+                        [(c["count"], round(c["x"])) for c in count_items],
+                        {name: info["count"] for name, info in detected.items()})
     
     return detected, raw_text
 
 
+def analyze_results(results):
+    """Derive UI state and detected ores from one set of OCR results"""
+    with metrics.span("match"):
+        detected, raw_text = match_ores(results)
+        is_forge_ui, has_ores_placed = forge_ui_state(raw_text.lower())
+    return {
+        "is_forge_ui": is_forge_ui,
+        "has_ores": has_ores_placed,
+        "detected": detected,
+        "raw_text": raw_text,
+    }
+
+
+# OCR-free open/closed check, so OCR can sleep while the forge is closed
+ui_detector = ForgeUIDetector() if get_ocr_settings().get("ui_detector", True) else None
+
+
+def get_ui_detector_stats():
+    """Checks, skipped OCR runs and average cost of the pixel UI detector"""
+    if ui_detector is None:
+        return {"trained": 0, "checks": 0, "skips": 0, "relearns": 0, "avg_us": 0.0}
+    return ui_detector.stats()
+
+
+def check_forge_ui(img, region=None):
+    """OCR-free forge check with the pixel UI detector.
+    
+    Returns:
+        bool or None: None when the detector is off or untrained for the region
+    """
+    if ui_detector is None:
+        return None
+    return ui_detector.check(_region_key(region), img)
+
+
+def _text_rects(results):
+    """(x_min, y_min, x_max, y_max) of every OCR result"""
+    rects = []
+    for bbox, _, _ in results:
+        xs = [p[0] for p in bbox]
+        ys = [p[1] for p in bbox]
+        rects.append((min(xs), min(ys), max(xs), max(ys)))
+    return rects
+
+
+def ocr_frame(img, region=None, pipeline=None, region_name="forge_slots"):
+    """OCR a capture unless the UI detector is sure the forge is still closed.
+    
+    Returns:
+        tuple: (results, frame_changed, verdict)
+        - results: read_text results, or None when OCR was skipped (UI
+          detector sure the forge is closed, or the model is unloaded)
+        - frame_changed: False if the frame gate reused the previous OCR result
+        - verdict: the UI detector's open/closed guess (None = no reference)
+    """
+    verdict = None
+    if reader_unloaded:
+        return None, False, verdict  # frame from before the unload, or a reload is pending
+    if ui_detector is not None:
+        run_ocr, verdict = ui_detector.should_ocr(_region_key(region), img)
+        if not run_ocr:
+            return None, False, verdict
+    gate_hits = frame_gate.hits
+    results = read_text(img, region, pipeline, region_name)
+    return results, frame_gate.hits == gate_hits, verdict
+
+
+def analyze_ocr(img, region, results, frame_changed, verdict):
+    """Analysis dict for ocr_frame's output; teaches the UI detector from it"""
+    if results is None:
+        return {"is_forge_ui": False, "has_ores": False, "detected": {}, "raw_text": "",
+                "frame_changed": False, "ocr_ran": False}
+    analysis = analyze_results(results)
+    analysis["frame_changed"] = frame_changed
+    analysis["ocr_ran"] = True
+    if ui_detector is not None:
+        ui_detector.update(_region_key(region), img, verdict, analysis["is_forge_ui"], _text_rects(results))
+    return analysis
+
+
+def analyze_frame(region=None, source=None, pipeline=None, region_name="forge_slots"):
+    """Capture the region once, OCR it once, and analyze it.
+    
+    source is the capture source (default: the live screen); pipeline overrides
+    the preprocessing preset configured for region_name. OCR is skipped while
+    the pixel UI detector sees the forge closed.
+    
+    Returns:
+        dict: {is_forge_ui, has_ores, detected, raw_text, frame_changed, ocr_ran}
+        - is_forge_ui: True if forge UI is detected
+        - has_ores: True if at least one ore is in the slots (not all "Empty")
+        - detected: ore_name -> {name, count, rarity, multiplier}
+        - raw_text: The raw OCR text for debugging
+        - frame_changed: False if the frame gate reused the previous OCR result
+        - ocr_ran: False if the UI detector skipped OCR
+    """
+    img = capture_screen(region, source)
+    
+    # Run OCR - get bounding boxes too for position-based matching
+    # (cached while the frame is unchanged)
+    results, frame_changed, verdict = ocr_frame(img, region, pipeline, region_name)
+    return analyze_ocr(img, region, results, frame_changed, verdict)
+
+
+def detect_forge_ui(region=None, source=None):
+    """Check if the Forge UI is currently visible on screen.
+    
+    Returns:
+        tuple: (is_forge_ui, has_ores_placed, raw_text)
+    """
+    analysis = analyze_frame(region, source)
+    return analysis["is_forge_ui"], analysis["has_ores"], analysis["raw_text"].lower()
+
+
+def scan_for_ores(region=None, source=None):
+    """Capture screen (or any capture source) and detect ores using OCR"""
+    analysis = analyze_frame(region, source)
+    return analysis["detected"], analysis["raw_text"]
+
+
 if __name__ == "__main__":
     # Test scan
     from calculator import calculate_forge, format_results
@@ -0,0 +1,230 @@
+"""Out-of-process EasyOCR worker
+
+Torch inference holds the GIL for long stretches, which stalls the Tk
+overlay while a frame is read. OCRWorker runs the EasyOCR reader in a child
+process instead. Frames are written into a shared-memory block and only
+(shape, dtype) go over the request queue; results come back on a result
+queue. RemoteReader exposes the reader methods ocr_scanner uses (detect,
+recognize, readtext), so the scanning code doesn't care where OCR runs.
+
+If the worker dies mid-request it is restarted and the request is retried
+once. shutdown() stops the process and frees the shared memory.
+"""
+
+import sys
+import os
+import multiprocessing as mp
+import queue
+import threading
+import time
+from multiprocessing import shared_memory
+sys.path.insert(0, os.path.dirname(__file__))
+
+import numpy as np
+
+from log import get_logger
+
+log = get_logger("ocr")
+
+START_TIMEOUT = 300.0   # first start may download the models
+REQUEST_TIMEOUT = 60.0
+POLL_INTERVAL = 0.5     # how often a waiting call checks the worker is alive
+MAX_RESTARTS = 3        # consecutive failed starts before giving up
+
+
+class OCRWorkerError(RuntimeError):
+    pass
+
+
+def _attach(name):
+    """Open the parent's shared-memory block (the parent owns and unlinks it)"""
+    try:
+        return shared_memory.SharedMemory(name=name, track=False)
+    except TypeError:
+        # Python < 3.13: registration goes to the parent's resource tracker,
+        # which already knows the block, so it isn't unlinked twice
+        return shared_memory.SharedMemory(name=name)
+
+
+def _worker_main(ocr_settings, requests, results):
+    """Child process: build the reader, then serve requests until told to stop"""
+    from ocr_backend import resolve_backend, create_reader, warm_up
+
+    try:
+        backend = resolve_backend(ocr_settings)
+        reader = create_reader(backend)
+        warm_up(reader)
+    except Exception as e:
+        results.put(("error", None, f"{type(e).__name__}: {e}"))
+        return
+    results.put(("ready", None, backend))
+
+    # The parent replaces its block when a bigger frame arrives; keep only the
+    # current one attached so the old mapping is released once it's unlinked
+    block = None
+    while True:
+        request = requests.get()
+        if request is None:
+            break
+        request_id, method, shm_name, shape, dtype, kwargs = request
+        try:
+            if block is None or block.name != shm_name:
+                if block is not None:
+                    block.close()
+                    block = None
+                block = _attach(shm_name)
+            img = np.ndarray(shape, dtype=dtype, buffer=block.buf)
+            result = getattr(reader, method)(img, **kwargs)
+            results.put(("ok", request_id, result))
+        except Exception as e:
+            results.put(("error", request_id, f"{type(e).__name__}: {e}"))
+        img = None  # release the view (even after an error) so the block can be closed
+
+    if block is not None:
+        block.close()
+
+
+class OCRWorker:
+    """Owns the OCR child process and the shared frame buffer"""
+
+    def __init__(self, ocr_settings):
+        self.ocr_settings = dict(ocr_settings)
+        self.backend = None
+        self.restarts = 0
+        self._ctx = mp.get_context("spawn")  # no forked Tk/torch state
+        self._process = None
+        self._requests = None
+        self._results = None
+        self._shm = None
+        self._next_id = 0
+        self._lock = threading.Lock()  # one request in flight: the frame buffer is shared
+
+    def start(self):
+        """Start the worker and wait until its reader is warmed up"""
+        with self._lock:
+            self._start()
+        return self.backend
+
+    def _start(self):
+        self._requests = self._ctx.Queue()
+        self._results = self._ctx.Queue()
+        self._process = self._ctx.Process(
+            target=_worker_main,
+            args=(self.ocr_settings, self._requests, self._results),
+            name="ocr-worker",
+            daemon=True,
+        )
+        self._process.start()
+        status, _, payload = self._receive(START_TIMEOUT)
+        if status != "ready":
+            self._stop()
+            raise OCRWorkerError(f"OCR worker failed to start: {payload}")
+        self.backend = payload
+
+    def _receive(self, timeout):
+        """Next message from the worker, noticing if it died meanwhile"""
+        deadline = time.monotonic() + timeout
+        while True:
+            try:
+                return self._results.get(timeout=POLL_INTERVAL)
+            except queue.Empty:
+                if not self._process.is_alive():
+                    raise OCRWorkerError(f"OCR worker exited (code {self._process.exitcode})")
+                if time.monotonic() > deadline:
+                    raise OCRWorkerError("OCR worker timed out")
+
+    def _frame_buffer(self, img):
+        """Copy a frame into the shared block, growing it when needed"""
+        if self._shm is None or self._shm.size < img.nbytes:
+            if self._shm is not None:
+                self._shm.close()
+                self._shm.unlink()
+            self._shm = shared_memory.SharedMemory(create=True, size=max(img.nbytes, 1))
+        view = np.ndarray(img.shape, dtype=img.dtype, buffer=self._shm.buf)
+        view[...] = img
+        del view
+        return self._shm.name
+
+    def call(self, method, img, **kwargs):
+        """Run reader.<method>(img, **kwargs) in the worker"""
+        img = np.ascontiguousarray(img)
+        with self._lock:
+            for attempt in range(2):
+                if self._process is None or not self._process.is_alive():
+                    self._restart()
+                self._next_id += 1
+                request_id = self._next_id
+                shm_name = self._frame_buffer(img)
+                self._requests.put((request_id, method, shm_name, img.shape, img.dtype.str, kwargs))
+                try:
+                    while True:
+                        status, reply_id, payload = self._receive(REQUEST_TIMEOUT)
+                        if reply_id == request_id:
+                            break  # older replies belong to timed-out requests
+                except OCRWorkerError as e:
+                    log.warning("%s - restarting worker", e)
+                    self._stop()
+                    if attempt:
+                        raise
+                    continue
+                if status == "error":
+                    raise OCRWorkerError(payload)
+                self.restarts = 0
+                return payload
+
+    def _restart(self):
+        if self.restarts >= MAX_RESTARTS:
+            raise OCRWorkerError("OCR worker keeps crashing - giving up")
+        self.restarts += 1
+        self._stop()
+        self._start()
+
+    def _stop(self):
+        process, self._process = self._process, None
+        if process is None:
+            return
+        if process.is_alive():
+            try:
+                self._requests.put(None)
+            except Exception:
+                pass
+            process.join(timeout=3)
+            if process.is_alive():
+                process.terminate()
+                process.join(timeout=3)
+        for q in (self._requests, self._results):
+            q.close()
+            q.cancel_join_thread()
+
+    def shutdown(self):
+        """Stop the worker process and free the frame buffer"""
+        with self._lock:
+            self._stop()
+            if self._shm is not None:
+                self._shm.close()
+                self._shm.unlink()
+                self._shm = None
+
+    def is_alive(self):
+        return self._process is not None and self._process.is_alive()
+
+    @property
+    def pid(self):
+        process = self._process
+        return process.pid if process is not None else None
+
+
+class RemoteReader:
+    """EasyOCR Reader look-alike that forwards calls to an OCRWorker"""
+
+    def __init__(self, worker):
+        self.worker = worker
+
+    def detect(self, img, **kwargs):
+        return self.worker.call("detect", img, **kwargs)
+
+    def recognize(self, img, **kwargs):
+        return self.worker.call("recognize", img, **kwargs)
+
+    def readtext(self, img, **kwargs):
+        return self.worker.call("readtext", img, **kwargs)
@@ -0,0 +1,261 @@
+"""Ore name matching for OCR text
+
+ORE_PATTERNS maps lowercase text patterns to ore names. PatternMatcher
+compiles them once into an Aho-Corasick automaton (pattern found inside the
+OCR text) plus a substring index (OCR text is a partial read of a pattern),
+so each text item is matched in a single pass instead of looping over every
+pattern. Text that matches no pattern goes through a BK-tree of ore names
+to catch OCR misreads ("eve ore", "topa2 ore") by edit distance.
+"""
+
+import sys
+import os
+from collections import deque
+from functools import lru_cache
+sys.path.insert(0, os.path.dirname(__file__))
+
+from data import ORES
+
+MIN_PARTIAL_LEN = 4  # shortest OCR text accepted as a partial read of a pattern
+
+
+def build_ore_patterns():
+    """Build OCR patterns from ore names (insertion order matters)"""
+    patterns = {}
+    for ore_name in ORES.keys():
+        name_lower = ore_name.lower()
+        base = name_lower.replace(" ore", "").replace(" crystal", "").strip()
+
+        patterns[name_lower] = ore_name
+        patterns[base] = ore_name
+        patterns[base.replace(" ", "")] = ore_name
+
+        if len(base) >= 5:
+            patterns[base[:5]] = ore_name
+    return patterns
+
+
+ORE_PATTERNS = build_ore_patterns()
+
+
+class PatternMatcher:
+    """Longest-pattern lookup over a fixed pattern table.
+
+    Gives the same answer as checking every pattern in table order:
+    - a pattern contained in the text scores len(pattern)
+    - text (>= MIN_PARTIAL_LEN chars) contained in a longer pattern scores len(text)
+    The highest score wins; ties go to the pattern that comes first in the table.
+    """
+
+    def __init__(self, patterns):
+        self.patterns = list(patterns.keys())
+        self.values = list(patterns.values())
+        self._build_automaton()
+        self._build_partial_index()
+
+    def _build_automaton(self):
+        # Trie of all patterns
+        self._goto = [{}]
+        self._fail = [0]
+        # Best (length, -index) of any pattern ending at this state, incl. via fail links
+        self._best = [None]
+
+        for index, pattern in enumerate(self.patterns):
+            state = 0
+            for ch in pattern:
+                nxt = self._goto[state].get(ch)
+                if nxt is None:
+                    nxt = len(self._goto)
+                    self._goto[state][ch] = nxt
+                    self._goto.append({})
+                    self._fail.append(0)
+                    self._best.append(None)
+                state = nxt
+            key = (len(pattern), -index)
+            if self._best[state] is None or key > self._best[state]:
+                self._best[state] = key
+
+        # Breadth-first fail links; fold the fail state's best match into each state
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for ch, nxt in self._goto[state].items():
+                queue.append(nxt)
+                f = self._fail[state]
+                while f and ch not in self._goto[f]:
+                    f = self._fail[f]
+                self._fail[nxt] = self._goto[f].get(ch, 0)
+                inherited = self._best[self._fail[nxt]]
+                if inherited is not None and (self._best[nxt] is None or inherited > self._best[nxt]):
+                    self._best[nxt] = inherited
+
+    def _build_partial_index(self):
+        # substring -> first pattern index that strictly contains it
+        self._partial = {}
+        for index, pattern in enumerate(self.patterns):
+            n = len(pattern)
+            for length in range(MIN_PARTIAL_LEN, n):
+                for start in range(n - length + 1):
+                    self._partial.setdefault(pattern[start:start + length], index)
+
+    def find_longest(self, text):
+        """Longest pattern occurring in text as (length, index), or None"""
+        best = None
+        state = 0
+        for ch in text:
+            while state and ch not in self._goto[state]:
+                state = self._fail[state]
+            state = self._goto[state].get(ch, 0)
+            found = self._best[state]
+            if found is not None and (best is None or found > best):
+                best = found
+        return best
+
+    def match(self, text):
+        """Best ore for a lowercase OCR text item.
+
+        Returns:
+            tuple: (ore_name, match_len) - (None, 0) if nothing matches
+        """
+        candidates = []
+        forward = self.find_longest(text)
+        if forward is not None:
+            candidates.append(forward)
+        if len(text) >= MIN_PARTIAL_LEN:
+            index = self._partial.get(text)
+            if index is not None:
+                candidates.append((len(text), -index))
+        if not candidates:
+            return None, 0
+        length, neg_index = max(candidates)
+        return self.values[-neg_index], length
+
+
+ore_matcher = PatternMatcher(ORE_PATTERNS)
+
+
+def match_ore_name(text):
+    """Best ore for an OCR text item (any case). Returns (ore_name, match_len)."""
+    return ore_matcher.match(text.lower().strip())
+
+
+# ============ FUZZY MATCHING ============
+
+MIN_FUZZY_LEN = 3  # shorter items ("x3", "!") are never fuzzy-matched
+
+
+def edit_distance(a, b):
+    """Optimal-string-alignment distance (Levenshtein plus adjacent swaps)"""
+    if a == b:
+        return 0
+    prev2 = None
+    previous = list(range(len(b) + 1))
+    for i in range(1, len(a) + 1):
+        current = [i] + [0] * len(b)
+        for j in range(1, len(b) + 1):
+            cost = a[i - 1] != b[j - 1]
+            d = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + cost)
+            if i > 1 and j > 1 and a[i - 1] == b[j - 2] and a[i - 2] == b[j - 1]:
+                d = min(d, prev2[j - 2] + 1)  # transposition ("bleu" -> "blue")
+            current[j] = d
+        prev2, previous = previous, current
+    return previous[-1]
+
+
+def max_fuzzy_distance(text):
+    """Edit-distance cutoff for a text of this length"""
+    if len(text) <= 5:
+        return 1
+    if len(text) <= 10:
+        return 2
+    return 3
+
+
+class BKTree:
+    """Burkhard-Keller tree: finds all words within an edit distance of a query"""
+    
+    def __init__(self):
+        self.root = None  # (word, value, {distance: child})
+        self.size = 0
+    
+    def add(self, word, value):
+        if self.root is None:
+            self.root = (word, value, {})
+            self.size = 1
+            return
+        node = self.root
+        while True:
+            d = edit_distance(word, node[0])
+            if d == 0:
+                return  # already indexed
+            child = node[2].get(d)
+            if child is None:
+                node[2][d] = (word, value, {})
+                self.size += 1
+                return
+            node = child
+    
+    def search(self, word, max_distance):
+        """All (distance, word, value) within max_distance of word"""
+        found = []
+        stack = [self.root] if self.root else []
+        while stack:
+            node_word, value, children = stack.pop()
+            d = edit_distance(word, node_word)
+            if d <= max_distance:
+                found.append((d, node_word, value))
+            # Triangle inequality: only children in [d - max, d + max] can match
+            for child_d, child in children.items():
+                if d - max_distance <= child_d <= d + max_distance:
+                    stack.append(child)
+        return found
+
+
+def _strip_suffix_words(text):
+    """Drop "ore"/"crystal" words (and close misreads) so only the distinguishing name is compared"""
+    words = [w for w in text.split()
+             if edit_distance(w, "ore") > 1 and edit_distance(w, "crystal") > 2]
+    return " ".join(words)
+
+
+def build_fuzzy_index():
+    """BK-tree over normalized ore base names ("blue", "lapis lazuli", "lapislazuli")"""
+    tree = BKTree()
+    for ore_name in ORES.keys():
+        base = _strip_suffix_words(ore_name.lower())
+        for word in (base, base.replace(" ", "")):
+            if len(word) >= MIN_FUZZY_LEN:
+                tree.add(word, ore_name)
+    return tree
+
+
+fuzzy_index = build_fuzzy_index()
+
+
+@lru_cache(maxsize=1024)
+def fuzzy_ore_name(text):
+    """Closest ore name to an OCR text item by edit distance.
+    
+    Only the distinguishing part of the name is compared ("gren crystal ore"
+    -> "gren" vs "green"), the match must be within max_fuzzy_distance, and it
+    must be strictly closer than any other ore - so similar names like the
+    crystal colours never resolve to the wrong ore on an ambiguous read.
+    
+    Returns:
+        tuple: (ore_name, distance) - (None, None) if nothing is close enough
+    """
+    text = _strip_suffix_words(" ".join(text.lower().split()))
+    if len(text) < MIN_FUZZY_LEN:
+        return None, None
+    
+    best = {}  # ore -> closest distance
+    for d, _, ore_name in fuzzy_index.search(text, max_fuzzy_distance(text)):
+        if d < best.get(ore_name, d + 1):
+            best[ore_name] = d
+    if not best:
+        return None, None
+    
+    ranked = sorted(best.items(), key=lambda kv: kv[1])
+    if len(ranked) > 1 and ranked[1][1] == ranked[0][1]:
+        return None, None  # ambiguous
+    return ranked[0]
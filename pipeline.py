@@ -0,0 +1,211 @@
+"""Streaming scan pipeline: capture -> recognize -> match -> calculate
+
+Each stage runs on its own thread and hands its output to the next stage
+through a LatestSlot - a one-item queue where a new item replaces the one
+waiting. A slow stage therefore always picks up the newest frame instead of
+working through a backlog, and a frame captured while OCR is busy replaces
+the previous one rather than queueing behind it.
+
+Every frame gets a sequence number at capture time that travels with its
+results, so the UI can refuse to show an older scan after a newer one.
+"""
+
+import threading
+import time
+
+from log import get_logger
+from metrics import metrics
+
+log = get_logger("pipeline")
+
+
+class LatestSlot:
+    """Bounded (size 1) queue that keeps only the newest item"""
+
+    def __init__(self, on_drop=None):
+        self.dropped = 0
+        self.on_drop = on_drop  # called for each superseded item
+        self._item = None
+        self._cond = threading.Condition()
+
+    def put(self, item):
+        with self._cond:
+            superseded = self._item is not None
+            if superseded:
+                self.dropped += 1  # superseded before anyone picked it up
+            self._item = item
+            self._cond.notify()
+        if superseded and self.on_drop:
+            self.on_drop()
+
+    def get(self, timeout=None):
+        """Take the waiting item, or None if nothing arrives within timeout"""
+        with self._cond:
+            if self._item is None:
+                self._cond.wait(timeout)
+            item, self._item = self._item, None
+            return item
+
+
+class Stage:
+    """One pipeline step: takes packets from inbox, passes results on"""
+
+    def __init__(self, name, func, inbox, output, on_error=None, on_stop=None):
+        self.name = name
+        self.func = func        # packet -> packet (or None to stop this frame here)
+        self.inbox = inbox
+        self.output = output    # callable taking the resulting packet
+        self.on_error = on_error
+        self.on_stop = on_stop  # called when a frame goes no further (None or error)
+        self.processed = 0
+        self.errors = 0
+        self.busy_time = 0.0
+        self._thread = None
+
+    def start(self, running):
+        self._thread = threading.Thread(target=self._run, args=(running,),
+                                        name=f"pipeline-{self.name}", daemon=True)
+        self._thread.start()
+
+    def _run(self, running):
+        while running.is_set():
+            packet = self.inbox.get(timeout=0.5)
+            if packet is None:
+                continue
+            start = time.perf_counter()
+            try:
+                packet = self.func(packet)
+            except Exception as e:
+                self.errors += 1
+                log.error("%s error on frame %s: %s", self.name, packet["seq"], e)
+                if self.on_error:
+                    self.on_error(self.name, packet, e)
+                packet = None
+            self.busy_time += time.perf_counter() - start
+            self.processed += 1
+            if packet is not None:
+                self.output(packet)
+            elif self.on_stop:
+                self.on_stop()
+
+    def join(self, timeout=None):
+        if self._thread:
+            self._thread.join(timeout)
+
+
+class ScanPipeline:
+    """Chain of stages fed by submit() and drained into a sink callback.
+
+    Packets are dicts; submit() adds "seq" (frame sequence number) and, unless
+    the caller stamped it before capturing, "captured_at" (perf_counter time).
+    Each stage adds its own keys.
+    """
+
+    def __init__(self, stages, sink, on_error=None):
+        self._running = threading.Event()
+        self._seq = 0
+        self._seq_lock = threading.Lock()
+        self._in_flight = 0  # submitted frames not yet sunk, dropped or stopped
+        self._idle = threading.Condition()
+        self.stages = []
+        self._entry = LatestSlot(self._finished)
+        inbox = self._entry
+
+        def sink_and_finish(packet):
+            try:
+                sink(packet)
+            finally:
+                self._finished()
+
+        for i, (name, func) in enumerate(stages):
+            last = i == len(stages) - 1
+            outbox = None if last else LatestSlot(self._finished)
+            stage = Stage(name, func, inbox, sink_and_finish if last else outbox.put, on_error,
+                          self._finished)
+            self.stages.append(stage)
+            inbox = outbox
+
+    def _finished(self):
+        with self._idle:
+            self._in_flight -= 1
+            if self._in_flight <= 0:
+                self._idle.notify_all()
+
+    def drain(self, timeout=None):
+        """Wait until every submitted frame has left the pipeline.
+
+        Returns:
+            bool: False if frames were still in flight after timeout
+        """
+        with self._idle:
+            return self._idle.wait_for(lambda: self._in_flight <= 0, timeout)
+
+    def start(self):
+        if self._running.is_set():
+            return
+        self._running.set()
+        for stage in self.stages:
+            stage.start(self._running)
+
+    def stop(self, timeout=2.0):
+        self._running.clear()
+        for stage in self.stages:
+            stage.join(timeout)
+
+    def submit(self, packet):
+        """Feed a captured frame. Returns its sequence number."""
+        with self._seq_lock:
+            self._seq += 1
+            seq = self._seq
+        packet["seq"] = seq
+        packet.setdefault("captured_at", time.perf_counter())
+        with self._idle:
+            self._in_flight += 1
+        self._entry.put(packet)
+        return seq
+
+    def stats(self):
+        """Per-stage counters; dropped = frames superseded while waiting for that stage"""
+        return {
+            stage.name: {
+                "processed": stage.processed,
+                "dropped": stage.inbox.dropped,
+                "errors": stage.errors,
+                "avg_ms": stage.busy_time * 1000 / stage.processed if stage.processed else 0.0,
+            }
+            for stage in self.stages
+        }
+
+
+def create_scan_pipeline(sink, calculate, on_error=None):
+    """The forge scan pipeline.
+
+    Packets enter with "frame" (an RGB capture the pipeline may keep),
+    "region" and optionally "region_name" (picks the preprocess preset,
+    default "forge_slots"); the sink receives them (frame included) with
+    "results", "frame_changed", "verdict", "analysis" and "forge"
+    ({"Weapon": result, "Armor": result}) added. results is None when the UI detector skipped OCR.
+    calculate is calculate_forge(detected, craft_type); on_error(stage_name,
+    packet, exception) is called when a stage fails on a frame.
+    """
+    from ocr_scanner import ocr_frame, analyze_ocr
+
+    def recognize(packet):
+        # UI check and preprocessing happen inside ocr_frame, next to the caches they key
+        packet["results"], packet["frame_changed"], packet["verdict"] = ocr_frame(
+            packet["frame"], packet["region"], region_name=packet.get("region_name", "forge_slots"))
+        return packet
+
+    def match(packet):
+        packet["analysis"] = analyze_ocr(packet["frame"], packet["region"], packet["results"],
+                                         packet["frame_changed"], packet["verdict"])
+        return packet
+
+    def forge(packet):
+        detected = packet["analysis"]["detected"]
+        with metrics.span("calculate"):
+            packet["forge"] = {craft: calculate(detected, craft) for craft in ("Weapon", "Armor")}
+        return packet
+
+    return ScanPipeline([("recognize", recognize), ("match", match), ("calculate", forge)],
+                        sink, on_error)
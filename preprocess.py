@@ -0,0 +1,154 @@
+"""OCR preprocessing pipeline (crop, grayscale, resize, contrast, binarize)
+
+A pipeline is a dict of optional stages, applied in this order:
+    crop        [left, top, right, bottom] as fractions of the capture
+    grayscale   True to convert to a single luma channel
+    text_height target text height in px; the frame is downscaled so the
+                text detected in earlier scans ends up about this tall
+    normalize   True to stretch the 1st-99th percentile grey levels to 0-255
+                (needs grayscale)
+    binarize    True to threshold at the Otsu level (needs grayscale)
+
+All stages are vectorized NumPy. preprocess() also returns the transform
+needed to map OCR boxes back to capture coordinates, so the slot geometry
+in match_ores keeps working in source pixels.
+"""
+
+import numpy as np
+
+from log import get_logger
+
+log = get_logger("preprocess")
+
+PRESETS = {
+    "raw": {},                                    # full-colour capture as-is
+    "grey": {"grayscale": True},
+    "fast": {"grayscale": True, "text_height": 20, "normalize": True},
+    "binary": {"grayscale": True, "text_height": 20, "normalize": True, "binarize": True},
+}
+
+MIN_SCALE = 0.25  # never shrink more than this, whatever the text height
+
+
+def resolve_pipeline(pipeline):
+    """Accept a preset name or a stage dict"""
+    if pipeline is None:
+        return {}
+    if isinstance(pipeline, str):
+        if pipeline not in PRESETS:
+            log.warning("Unknown preset '%s' - using raw", pipeline)
+        return PRESETS.get(pipeline, {})
+    return pipeline
+
+
+def pipeline_key(pipeline):
+    """Hashable identity of a pipeline (for per-pipeline caches)"""
+    return tuple(sorted((k, tuple(v) if isinstance(v, list) else v) for k, v in pipeline.items()))
+
+
+def to_grayscale(img):
+    if img.ndim == 2:
+        return img
+    # Integer BT.601 luma weights (x256) - much faster than a float dot product.
+    # Widen before multiplying: NumPy 1.x keeps uint8 * np.uint16 scalar as uint8.
+    grey = img[:, :, 0].astype(np.uint16)
+    grey *= 77
+    grey += img[:, :, 1].astype(np.uint16) * np.uint16(150)
+    grey += img[:, :, 2].astype(np.uint16) * np.uint16(29)
+    return (grey >> 8).astype(np.uint8)
+
+
+def resize_area(img, new_w, new_h):
+    """Downscale by averaging the source pixels of each output pixel"""
+    h, w = img.shape[:2]
+    row_ends = (np.arange(1, new_h + 1) * h // new_h).astype(int)
+    col_ends = (np.arange(1, new_w + 1) * w // new_w).astype(int)
+    # Block sums from running sums: total up to each block end, minus the previous one
+    sums = np.diff(img.cumsum(axis=0, dtype=np.uint32)[row_ends - 1], axis=0, prepend=0)
+    sums = np.diff(sums.cumsum(axis=1)[:, col_ends - 1], axis=1, prepend=0)
+    counts = np.outer(np.diff(row_ends, prepend=0), np.diff(col_ends, prepend=0)).astype(np.uint32)
+    if img.ndim == 3:
+        counts = counts[:, :, None]
+    return ((sums + counts // 2) // counts).astype(np.uint8)
+
+
+def _histogram(grey):
+    return np.bincount(grey.ravel(), minlength=256).astype(np.float64)
+
+
+def contrast_lut(hist):
+    """LUT stretching the 1st-99th percentile range to 0-255"""
+    cdf = np.cumsum(hist) / hist.sum()
+    lo = int(np.searchsorted(cdf, 0.01))
+    hi = int(np.searchsorted(cdf, 0.99))
+    if hi <= lo:
+        return np.arange(256, dtype=np.uint8)
+    return np.clip((np.arange(256) - lo) * 255.0 / (hi - lo), 0, 255).astype(np.uint8)
+
+
+def otsu_threshold(hist):
+    """Grey level that best separates the histogram into two classes"""
+    levels = np.arange(256)
+    weight_bg = np.cumsum(hist)
+    weight_fg = weight_bg[-1] - weight_bg
+    mass_bg = np.cumsum(hist * levels)
+    mean_bg = mass_bg / np.maximum(weight_bg, 1)
+    mean_fg = (mass_bg[-1] - mass_bg) / np.maximum(weight_fg, 1)
+    between = weight_bg * weight_fg * (mean_bg - mean_fg) ** 2
+    return int(between.argmax())
+
+
+def preprocess(img, pipeline, text_height=None):
+    """Run the pipeline on a capture.
+
+    text_height is the current height (source px) of the text in this region,
+    as measured by an earlier detection; without it the resize stage is skipped.
+
+    Returns:
+        tuple: (image, transform) - transform is (x_offset, y_offset, x_scale, y_scale)
+    """
+    x0 = y0 = 0
+    sx = sy = 1.0
+
+    crop = pipeline.get("crop")
+    if crop:
+        h, w = img.shape[:2]
+        left, top, right, bottom = crop
+        x0, y0 = int(w * left), int(h * top)
+        img = img[y0:int(h * bottom), x0:int(w * right)]
+
+    if pipeline.get("grayscale"):
+        img = to_grayscale(img)
+
+    target = pipeline.get("text_height")
+    if target and text_height:
+        scale = max(MIN_SCALE, min(1.0, target / text_height))
+        h, w = img.shape[:2]
+        new_w, new_h = max(1, round(w * scale)), max(1, round(h * scale))
+        if (new_w, new_h) != (w, h):
+            img = resize_area(img, new_w, new_h)
+            sx, sy = new_w / w, new_h / h
+
+    if img.ndim == 2 and (pipeline.get("normalize") or pipeline.get("binarize")):
+        hist = _histogram(img)
+        lut = np.arange(256, dtype=np.uint8)
+        if pipeline.get("normalize"):
+            lut = contrast_lut(hist)
+            hist = np.bincount(lut, weights=hist, minlength=256)
+        if pipeline.get("binarize"):
+            level = otsu_threshold(hist)
+            lut = np.where(lut > level, 255, 0).astype(np.uint8)
+        img = lut[img]
+
+    return np.ascontiguousarray(img), (x0, y0, sx, sy)
+
+
+def map_results(results, transform):
+    """Map readtext-style results from preprocessed back to capture coordinates"""
+    x0, y0, sx, sy = transform
+    if (x0, y0, sx, sy) == (0, 0, 1.0, 1.0):
+        return results
+    return [
+        ([[x / sx + x0, y / sy + y0] for x, y in bbox], text, conf)
+        for bbox, text, conf in results
+    ]
@@ -0,0 +1,250 @@
+"""On-demand sampling profiler for every thread of the running app
+
+SamplingProfiler.start(seconds) runs a daemon thread that reads
+sys._current_frames() every SAMPLE_INTERVAL and counts whole stacks per
+thread (Tk main thread, capture loop, pipeline stages, macro...). Nothing is
+hooked into the interpreter, so there is no overhead when it isn't running
+and only one stack walk per thread per sample while it is.
+
+When the time is up it writes, to a profiles folder:
+- <stamp>.folded   collapsed stacks ("thread;outer;...;inner count"), for
+                   flamegraph.pl, speedscope or similar
+- <stamp>.txt      CPU use per thread and the top functions by self and
+                   inclusive on-CPU samples
+
+Whether a thread was working is read from its CPU clock
+(pthread_getcpuclockid, or GetThreadTimes on Windows), not from its stack:
+a sample counts as on-CPU when the thread used at least BUSY_FRACTION of the
+time since its previous sample. A thread in time.sleep, Event.wait or the
+log queue's dequeue is off-CPU whatever Python frame it's in. Where no
+per-thread clock exists, samples whose innermost frame is a known blocking
+wait are left out instead, and the report says so. OCR that runs in the
+worker process shows up as the caller waiting on its pipe.
+"""
+
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from pathlib import Path
+
+from log import get_logger
+
+log = get_logger("profiler")
+
+SAMPLE_INTERVAL = 0.005    # s between stack samples (~200 Hz)
+BUSY_FRACTION = 0.5        # share of a sample interval on CPU for the sample to count as busy
+TOP_FUNCTIONS = 25
+
+# Innermost frames that mean "blocked, not working" (fallback without CPU clocks)
+IDLE_FILES = ("threading.py", "queue.py", "selectors.py", "connection.py", "synchronize.py")
+IDLE_FUNCTIONS = ("mainloop",  # Tk waiting for events
+                  "dequeue", "_monitor")  # logging QueueListener (handlers.py)
+
+
+def _label(code, cache):
+    label = cache.get(code)
+    if label is None:
+        label = cache[code] = f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+    return label
+
+
+class ThreadClock:
+    """Per-thread CPU time in seconds, or None where the platform can't tell"""
+
+    THREAD_QUERY_LIMITED_INFORMATION = 0x0800
+
+    def __init__(self):
+        self._handles = {}  # native id -> Windows thread handle
+        self.available = hasattr(time, "pthread_getcpuclockid") or sys.platform == "win32"
+        if sys.platform == "win32":
+            import ctypes
+            from ctypes import wintypes
+            self._kernel32 = ctypes.windll.kernel32
+            self._kernel32.OpenThread.restype = wintypes.HANDLE
+            self._filetimes = [wintypes.FILETIME() for _ in range(4)]
+            self._byref = ctypes.byref
+
+    def cpu_time(self, ident, native_id):
+        try:
+            if sys.platform == "win32":
+                return self._windows_cpu_time(native_id)
+            if hasattr(time, "pthread_getcpuclockid"):
+                return time.clock_gettime(time.pthread_getcpuclockid(ident))
+        except (OSError, OverflowError, ValueError):
+            pass  # thread gone
+        return None
+
+    def _windows_cpu_time(self, native_id):
+        if native_id is None:
+            return None
+        handle = self._handles.get(native_id)
+        if handle is None:
+            handle = self._kernel32.OpenThread(self.THREAD_QUERY_LIMITED_INFORMATION, False, native_id)
+            if not handle:
+                return None
+            self._handles[native_id] = handle
+        creation, exit_, kernel, user = self._filetimes
+        if not self._kernel32.GetThreadTimes(handle, self._byref(creation), self._byref(exit_),
+                                             self._byref(kernel), self._byref(user)):
+            return None
+        ticks = sum((t.dwHighDateTime << 32) | t.dwLowDateTime for t in (kernel, user))
+        return ticks / 1e7  # 100 ns units
+
+    def close(self):
+        for handle in self._handles.values():
+            self._kernel32.CloseHandle(handle)
+        self._handles.clear()
+
+
+class SamplingProfiler:
+    """Samples all Python threads for a while, then writes the results"""
+
+    def __init__(self, interval=SAMPLE_INTERVAL):
+        self.interval = interval
+        self.stacks = Counter()   # (thread, outer, ..., inner) -> samples
+        self.busy = Counter()     # same, only samples where the thread was on CPU
+        self.cpu = {}             # thread -> CPU seconds used while sampling
+        self.cpu_clock = False    # busy measured from CPU clocks (else guessed from frames)
+        self.samples = 0
+        self.elapsed = 0.0
+        self._thread = None
+        self._stop = threading.Event()
+
+    def is_running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self, duration, out_dir=None, on_done=None):
+        """Sample for `duration` seconds on a background thread.
+
+        If out_dir is given the results are written there when sampling ends;
+        on_done(paths) is then called on the profiler thread - paths is None
+        if nothing was written.
+        """
+        if self.is_running():
+            raise RuntimeError("Profiler already running")
+        self.stacks.clear()
+        self.busy.clear()
+        self.cpu.clear()
+        self.samples = 0
+        self._stop.clear()
+
+        def run():
+            self._sample(duration)
+            paths = None
+            if out_dir:
+                try:
+                    paths = self.write(out_dir)
+                except OSError as e:
+                    log.error("Could not write profile: %s", e)
+            if on_done:
+                on_done(paths)
+
+        self._thread = threading.Thread(target=run, name="profiler", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def _sample(self, duration):
+        me = threading.get_ident()
+        labels = {}
+        clock = ThreadClock()
+        self.cpu_clock = clock.available
+        first_cpu = {}   # thread name -> CPU time when first seen
+        last = {}        # ident -> (wall time, CPU time) at its previous sample
+        start = time.perf_counter()
+        end = start + duration
+        try:
+            while not self._stop.is_set() and time.perf_counter() < end:
+                threads = {t.ident: t for t in threading.enumerate()}
+                now = time.perf_counter()
+                for ident, frame in sys._current_frames().items():
+                    if ident == me:
+                        continue
+                    thread = threads.get(ident)
+                    name = thread.name if thread else f"thread-{ident}"
+                    stack = []
+                    while frame is not None:
+                        stack.append(_label(frame.f_code, labels))
+                        frame = frame.f_back
+                    stack.append(name)
+                    stack = tuple(reversed(stack))
+                    self.stacks[stack] += 1
+
+                    cpu = clock.cpu_time(ident, getattr(thread, "native_id", None)) if self.cpu_clock else None
+                    if cpu is None:
+                        if not self.cpu_clock and not self._is_idle(stack):
+                            self.busy[stack] += 1
+                        continue
+                    first_cpu.setdefault(name, cpu)
+                    self.cpu[name] = cpu - first_cpu[name]
+                    previous = last.get(ident)
+                    last[ident] = (now, cpu)
+                    if previous and cpu - previous[1] >= BUSY_FRACTION * (now - previous[0]):
+                        self.busy[stack] += 1
+                self.samples += 1
+                self._stop.wait(self.interval)
+        finally:
+            clock.close()
+        self.elapsed = time.perf_counter() - start
+
+    @staticmethod
+    def _is_idle(stack):
+        if len(stack) == 1:
+            return True  # thread with no Python frames
+        name, _, location = stack[-1].partition(" (")
+        return name in IDLE_FUNCTIONS or location.split(":")[0].endswith(IDLE_FILES)
+
+    def summary(self):
+        """Text report: per-thread samples and CPU use, and the top on-CPU functions"""
+        per_thread = Counter()
+        busy_thread = Counter()
+        self_counts = Counter()
+        inclusive = Counter()
+        for stack, n in self.stacks.items():
+            per_thread[stack[0]] += n
+        for stack, n in self.busy.items():
+            busy_thread[stack[0]] += n
+            self_counts[stack[-1]] += n
+            for func in set(stack[1:]):
+                inclusive[func] += n
+
+        busy_total = sum(busy_thread.values()) or 1
+        how = ("CPU share from per-thread CPU clocks" if self.cpu_clock
+               else "no per-thread CPU clock: busy guessed from the innermost frame")
+        lines = [
+            f"{self.samples} samples over {self.elapsed:.1f}s "
+            f"(every {self.interval * 1000:.0f} ms, {len(per_thread)} threads; {how})",
+            "",
+            "Thread                          samples     cpu",
+        ]
+        for thread, n in per_thread.most_common():
+            if self.cpu_clock:
+                share = f"{self.cpu[thread] / self.elapsed:>7.0%}" if thread in self.cpu and self.elapsed else "      ?"
+            else:
+                share = f"{busy_thread[thread] / n:>7.0%}"
+            lines.append(f"{thread[:30]:<30} {n:>9} {share}")
+        for title, counts in (("self", self_counts), ("inclusive", inclusive)):
+            lines += ["", f"Top functions by {title} on-CPU samples", f"{'samples':>8} {'share':>6}  function"]
+            for func, n in counts.most_common(TOP_FUNCTIONS):
+                lines.append(f"{n:>8} {n / busy_total:>6.1%}  {func}")
+        return "\n".join(lines) + "\n"
+
+    def write(self, out_dir):
+        """Write <stamp>.folded and <stamp>.txt to out_dir.
+
+        Returns:
+            tuple: (folded_path, summary_path)
+        """
+        out_dir = Path(out_dir)
+        out_dir.mkdir(parents=True, exist_ok=True)
+        stamp = time.strftime("profile-%Y%m%d-%H%M%S")
+        folded = out_dir / f"{stamp}.folded"
+        with open(folded, "w", encoding="utf-8") as f:
+            for stack, n in self.stacks.most_common():
+                f.write(";".join(part.replace(";", ":") for part in stack) + f" {n}\n")
+        summary = out_dir / f"{stamp}.txt"
+        summary.write_text(self.summary(), encoding="utf-8")
+        return folded, summary
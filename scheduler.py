@@ -0,0 +1,102 @@
+"""Adaptive scan scheduling for the auto-detect loop
+
+Instead of a fixed sleep, the delay before the next scan follows what the
+last scans saw:
+- a frame change (or a UI state change) drops the delay to the fastest rate,
+  so dropped-in ores show up quickly
+- every unchanged frame doubles the delay, up to a cap that depends on the
+  UI state (short while waiting for ores, long while the forge is closed)
+- the delay never falls below the measured scan latency, so OCR can't take
+  more than about half of a core even when the screen keeps changing
+- scans that only ran the pixel UI detector (no OCR) cost next to nothing,
+  so they repeat at a steady CHEAP_INTERVAL to catch the forge opening
+"""
+
+import threading
+
+# UI states reported by the auto-detect loop
+CLOSED = "closed"      # forge UI not visible
+WAITING = "waiting"    # forge UI open, slots empty
+SCANNING = "scanning"  # ores placed
+
+MIN_INTERVAL = 0.25    # fastest scan rate right after a change (s)
+CHEAP_INTERVAL = 0.5   # rate while the pixel UI detector stands in for OCR
+BACKOFF = 2.0          # delay multiplier per unchanged frame
+LATENCY_FACTOR = 1.0   # delay >= this many scan latencies
+SMOOTHING = 0.3        # weight of the newest sample in the running averages
+
+# Longest delay per UI state, as a multiple of preferences.scan_interval
+STATE_CAPS = {
+    CLOSED: 4.0,
+    WAITING: 0.5,
+    SCANNING: 1.0,
+}
+
+
+class AdaptiveScheduler:
+    """Works out when the next scan should run; one scan at a time"""
+
+    def __init__(self, base_interval=2.0):
+        self.base_interval = max(MIN_INTERVAL, base_interval)
+        self.state = CLOSED
+        self.delay = MIN_INTERVAL
+        self.latency = 0.0       # running average scan time (s)
+        self.change_rate = 0.0   # running fraction of scans that saw a change
+        self.scans = 0
+        self._wake = threading.Event()
+
+    def _cap(self, state):
+        return max(MIN_INTERVAL, self.base_interval * STATE_CAPS.get(state, 1.0))
+
+    def record(self, state, changed, latency, ocr_ran=True):
+        """Feed the outcome of a scan and work out the delay before the next one.
+
+        Returns:
+            float: seconds to wait before the next scan
+        """
+        self.scans += 1
+        if self.scans == 1:
+            self.latency = latency
+        else:
+            self.latency += SMOOTHING * (latency - self.latency)
+
+        changed = changed or state != self.state
+        self.change_rate += SMOOTHING * (float(changed) - self.change_rate)
+        self.state = state
+
+        if not ocr_ran:
+            self.delay = CHEAP_INTERVAL
+            return self.delay
+        if changed:
+            # React fast, but slow down when every frame changes (animations):
+            # those scans always pay for a full OCR and carry little news
+            self.delay = MIN_INTERVAL * (1.0 + 3.0 * self.change_rate)
+        else:
+            self.delay *= BACKOFF
+
+        floor = max(MIN_INTERVAL, self.latency * LATENCY_FACTOR)
+        self.delay = min(max(self.delay, floor), max(self._cap(state), floor))
+        return self.delay
+
+    def wait(self, delay=None):
+        """Sleep until the next scan is due or wake() is called.
+
+        Returns:
+            bool: True if woken early
+        """
+        woken = self._wake.wait(self.delay if delay is None else delay)
+        self._wake.clear()
+        return woken
+
+    def wake(self):
+        """Run the next scan now (e.g. after a region or mode change)"""
+        self._wake.set()
+
+    def stats(self):
+        return {
+            "state": self.state,
+            "delay": self.delay,
+            "latency": self.latency,
+            "change_rate": self.change_rate,
+            "scans": self.scans,
+        }
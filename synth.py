@@ -0,0 +1,212 @@
+"""Synthetic forge-slot frames for load and accuracy testing
+
+Renders the forge slots the way scan_for_ores reads them - each slot shows
+an ore name with its "x<count>" label below, or "Empty" - for random
+compositions drawn from ORES, with configurable scaling, font jitter and
+pixel noise. Every frame comes with its ground truth: the `detected` dict
+scan_for_ores should return, and the readtext-style OCR results a perfect
+reader would give (optionally with OCR-like misreads), so the matcher and
+count assignment can be stressed without running OCR at all.
+
+Usage:
+    python synth.py out_dir [--frames 500] [--seed 0] [--noise 6] [--scale 0.8 1.4]
+
+writes out_dir/*.png plus a labels.json in the benchmark corpus format.
+"""
+
+import argparse
+import json
+import os
+import random
+import sys
+from functools import lru_cache
+sys.path.insert(0, os.path.dirname(__file__))
+
+import numpy as np
+from PIL import Image, ImageDraw, ImageFont
+
+from data import ORES
+
+SLOTS = 4
+SLOT_WIDTH = 150       # min px per slot at scale 1.0; widened to fit the longest label
+SLOT_MARGIN = 8        # min px at scale 1.0 between a label and its slot edges
+NAME_Y = 70            # ore name centre
+COUNT_DY = 32          # count label centre, below the name
+FONT_SIZE = 18
+BACKGROUND = (28, 24, 22)
+TEXT_COLOR = (235, 235, 235)
+
+FONT_NAMES = ("arialbd.ttf", "arial.ttf", "DejaVuSans-Bold.ttf", "DejaVuSans.ttf")
+
+# Characters OCR commonly confuses
+MISREADS = {"o": "0", "l": "1", "i": "l", "e": "c", "s": "5", "a": "o", "n": "m", "r": "n"}
+
+DEFAULT_CONFIG = {
+    "scale": (1.0, 1.0),     # random frame scale range
+    "font_jitter": 0,        # +/- font size px per label
+    "font_faces": False,     # pick a random available font per label
+    "position_jitter": 0,    # +/- px offset per label
+    "noise": 0.0,            # gaussian pixel noise sigma
+    "empty_rate": 0.25,      # chance a slot is empty
+    "max_count": 20,
+    "indicators": True,      # draw "Forge Chances" / "Multiplier" so the UI is recognized
+    "misread_rate": 0.0,     # per-character misread chance in the ground-truth OCR results
+}
+
+
+@lru_cache(maxsize=64)
+def _font(name, size):
+    try:
+        return ImageFont.truetype(name, size)
+    except OSError:
+        return None
+
+
+def available_fonts():
+    return [name for name in FONT_NAMES if _font(name, FONT_SIZE) is not None]
+
+
+def random_composition(rng, config=DEFAULT_CONFIG):
+    """Random slot contents: a list of SLOTS (ore_name, count) tuples or None (empty)"""
+    config = {**DEFAULT_CONFIG, **config}
+    names = list(ORES.keys())
+    slots = [None if rng.random() < config["empty_rate"]
+             else (rng.choice(names), rng.randint(1, config["max_count"]))
+             for _ in range(SLOTS)]
+    if not any(slots):
+        slots[rng.randrange(SLOTS)] = (rng.choice(names), rng.randint(1, config["max_count"]))
+    return slots
+
+
+def expected_detected(slots):
+    """The detected dict scan_for_ores should produce for these slots"""
+    detected = {}
+    for slot in slots:
+        if slot is None:
+            continue
+        ore_name, count = slot
+        entry = detected.setdefault(ore_name, {
+            "name": ore_name,
+            "count": 0,
+            "rarity": ORES[ore_name]["rarity"],
+            "multiplier": ORES[ore_name]["multiplier"],
+        })
+        entry["count"] += count
+    return detected
+
+
+def _misread(text, rng, rate):
+    if rate <= 0:
+        return text
+    return "".join(MISREADS.get(ch.lower(), ch) if rng.random() < rate else ch for ch in text)
+
+
+def render_frame(slots, rng, config=DEFAULT_CONFIG):
+    """Draw one forge-slots frame.
+
+    Returns:
+        tuple: (image, detected, ocr_results)
+        - image: RGB uint8 array
+        - detected: ground-truth detected dict
+        - ocr_results: readtext-style [(bbox, text, conf)] of every label drawn
+    """
+    config = {**DEFAULT_CONFIG, **config}
+    scale = rng.uniform(*config["scale"])
+    fonts = available_fonts() if config["font_faces"] else available_fonts()[:1]
+    jitter = config["position_jitter"]
+
+    def pick_font():
+        size = max(6, int(round((FONT_SIZE + rng.randint(-config["font_jitter"], config["font_jitter"])) * scale)))
+        return _font(rng.choice(fonts), size) if fonts else ImageFont.load_default()
+
+    def text_width(text, font):
+        left, _, right, _ = font.getbbox(text)
+        return right - left
+
+    # Pick every slot's fonts first, so the slots can be made wide enough
+    # for the longest name ("Magenta Crystal Ore" doesn't fit 150 px)
+    slot_labels = [[(text, pick_font()) for text in (["Empty"] if slot is None else [slot[0], f"x{slot[1]}"])]
+                   for slot in slots]
+    widest = max(text_width(text, font) for labels in slot_labels for text, font in labels)
+    slot_width = max(SLOT_WIDTH * scale, widest + 2 * (SLOT_MARGIN + jitter) * scale)
+    width = int(np.ceil(slot_width * SLOTS))
+    height = int((NAME_Y + COUNT_DY + 40) * scale)
+
+    img = Image.new("RGB", (width, height), BACKGROUND)
+    draw = ImageDraw.Draw(img)
+    results = []
+
+    def label(text, font, cx, cy):
+        cx += rng.randint(-jitter, jitter) * scale
+        cy += rng.randint(-jitter, jitter) * scale
+        left, top, right, bottom = draw.textbbox((0, 0), text, font=font)
+        x, y = cx - (right - left) / 2 - left, cy - (bottom - top) / 2 - top
+        draw.text((x, y), text, fill=TEXT_COLOR, font=font)
+        x0, y0, x1, y1 = draw.textbbox((x, y), text, font=font)
+        # Ground truth only covers what's actually in the frame (large font jitter can clip)
+        x0, x1 = max(0, x0), min(width, x1)
+        y0, y1 = max(0, y0), min(height, y1)
+        bbox = [[x0, y0], [x1, y0], [x1, y1], [x0, y1]]
+        results.append((bbox, _misread(text, rng, config["misread_rate"]), 0.99))
+
+    if config["indicators"]:
+        label("Forge Chances", pick_font(), width * 0.25, 16 * scale)
+        label("Multiplier", pick_font(), width * 0.75, 16 * scale)
+
+    for i, labels in enumerate(slot_labels):
+        cx = (i + 0.5) * slot_width
+        for row, (text, font) in enumerate(labels):
+            label(text, font, cx, (NAME_Y + row * COUNT_DY) * scale)
+
+    frame = np.asarray(img, dtype=np.uint8)
+    if config["noise"] > 0:
+        noise = np.random.default_rng(rng.getrandbits(32)).normal(0, config["noise"], frame.shape)
+        frame = np.clip(frame + noise, 0, 255).astype(np.uint8)
+    return frame, expected_detected(slots), results
+
+
+def generate(count, seed=0, config=DEFAULT_CONFIG):
+    """Yield (image, detected, ocr_results) for `count` random frames"""
+    rng = random.Random(seed)
+    for _ in range(count):
+        yield render_frame(random_composition(rng, config), rng, config)
+
+
+def write_corpus(out_dir, count, seed=0, config=DEFAULT_CONFIG):
+    """Write frames and a labels.json ({file: {ore: count}}) for benchmark.py"""
+    os.makedirs(out_dir, exist_ok=True)
+    labels = {}
+    for i, (frame, detected, _) in enumerate(generate(count, seed, config)):
+        name = f"synth_{i:05d}.png"
+        Image.fromarray(frame).save(os.path.join(out_dir, name))
+        labels[name] = {ore: info["count"] for ore, info in detected.items()}
+    with open(os.path.join(out_dir, "labels.json"), "w") as f:
+        json.dump(labels, f, indent=1)
+    return labels
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Render synthetic forge-slot frames")
+    parser.add_argument("out_dir")
+    parser.add_argument("--frames", type=int, default=500)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--scale", type=float, nargs=2, default=[1.0, 1.0], metavar=("MIN", "MAX"))
+    parser.add_argument("--font-jitter", type=int, default=0)
+    parser.add_argument("--font-faces", action="store_true")
+    parser.add_argument("--position-jitter", type=int, default=0)
+    parser.add_argument("--noise", type=float, default=0.0)
+    args = parser.parse_args()
+
+    config = {
+        "scale": tuple(args.scale),
+        "font_jitter": args.font_jitter,
+        "font_faces": args.font_faces,
+        "position_jitter": args.position_jitter,
+        "noise": args.noise,
+    }
+    labels = write_corpus(args.out_dir, args.frames, args.seed, config)
+    print(f"Wrote {len(labels)} frames to {args.out_dir}")
+
+
+if __name__ == "__main__":
+    main()
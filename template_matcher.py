@@ -0,0 +1,227 @@
+"""Template-matching recognizer for forge UI text (OCR-free fast path)
+
+Every text crop is reduced to a small fixed-size grey tile and compared
+against a library of labelled tiles with normalized cross-correlation, as a
+single matrix product. The library starts from ore names rendered from the
+ORES catalog and learns real samples from confident EasyOCR reads, which
+carry the game's actual font and scale.
+
+Count labels ("x12") are never learned or served: they differ from each other
+by a single glyph, so a near miss scores like a hit and becomes a silent
+wrong count. They go to the recognizer (and the exact-pixel tile cache).
+"""
+
+import sys
+import os
+import re
+import threading
+from functools import lru_cache
+sys.path.insert(0, os.path.dirname(__file__))
+
+import numpy as np
+from PIL import Image, ImageDraw, ImageFont
+
+from config import CONFIG_DIR
+from data import ORES
+from log import get_logger
+
+log = get_logger("templates")
+
+TEMPLATES_FILE = CONFIG_DIR / "templates.npz"
+
+TILE_SIZE = (96, 20)           # (w, h) every crop is resized to
+ASPECT_TOLERANCE = 0.3         # max relative aspect-ratio difference to compare at all
+MATCH_MARGIN = 0.03            # best label must beat the runner-up label by this much
+MAX_SAMPLES_PER_LABEL = 4      # captured samples kept per text label
+MAX_TEMPLATES = 600
+
+COUNT_LABEL = re.compile(r"x\d+", re.IGNORECASE)
+
+
+def is_count_label(label):
+    return COUNT_LABEL.fullmatch(label.strip()) is not None
+
+
+def _to_grey(crop):
+    if crop.ndim == 3:
+        crop = crop.mean(axis=2)
+    return crop.astype(np.uint8)
+
+
+def make_tile(crop):
+    """Resize a text crop to a TILE_SIZE grey tile (uint8)"""
+    img = Image.fromarray(_to_grey(crop))
+    return np.asarray(img.resize(TILE_SIZE, Image.BILINEAR), dtype=np.uint8)
+
+
+def _normalize(tiles):
+    """Zero-mean, unit-norm rows so a dot product is the NCC score"""
+    vectors = tiles.reshape(len(tiles), -1).astype(np.float32)
+    vectors -= vectors.mean(axis=1, keepdims=True)
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    return vectors / np.maximum(norms, 1e-6), norms[:, 0] > 1e-3
+
+
+@lru_cache(maxsize=4)
+def _load_font(size):
+    for name in ("arialbd.ttf", "arial.ttf", "DejaVuSans-Bold.ttf"):
+        try:
+            return ImageFont.truetype(name, size)
+        except OSError:
+            continue
+    return ImageFont.load_default()
+
+
+def render_text(text, height=24):
+    """Render light-on-dark text tightly cropped, like the forge UI labels"""
+    font = _load_font(height)
+    left, top, right, bottom = ImageDraw.Draw(Image.new("L", (1, 1))).textbbox((0, 0), text, font=font)
+    img = Image.new("L", (right - left + 4, bottom - top + 4), 0)
+    ImageDraw.Draw(img).text((2 - left, 2 - top), text, fill=255, font=font)
+    return np.asarray(img, dtype=np.uint8)
+
+
+def catalog_labels():
+    """Text labels the forge slots can show, built from the ORES catalog"""
+    labels = list(ORES.keys())
+    labels.append("Empty")
+    return labels
+
+
+class TemplateLibrary:
+    """Labelled text tiles matched with normalized cross-correlation"""
+
+    def __init__(self, threshold=0.92):
+        self.threshold = threshold
+        self.hits = 0
+        self.misses = 0
+        self.dirty = False
+        self._lock = threading.Lock()
+        self._labels = []
+        self._label_array = np.empty(0, dtype=object)  # same as _labels, for masking
+        self._sources = []   # "catalog" or "sample"
+        self._aspects = np.empty(0, dtype=np.float32)
+        self._tiles = np.empty((0, TILE_SIZE[1], TILE_SIZE[0]), dtype=np.uint8)
+        self._vectors = np.empty((0, TILE_SIZE[0] * TILE_SIZE[1]), dtype=np.float32)
+
+    def __len__(self):
+        return len(self._labels)
+
+    def _append(self, label, tile, aspect, source):
+        vector, valid = _normalize(tile[None])
+        if not valid[0]:
+            return False  # flat crop, nothing to correlate
+        self._labels.append(label)
+        self._label_array = np.append(self._label_array, np.array([label], dtype=object))
+        self._sources.append(source)
+        self._aspects = np.append(self._aspects, np.float32(aspect))
+        self._tiles = np.concatenate([self._tiles, tile[None]])
+        self._vectors = np.concatenate([self._vectors, vector])
+        return True
+
+    def _remove(self, index):
+        del self._labels[index]
+        self._label_array = np.delete(self._label_array, index)
+        del self._sources[index]
+        self._aspects = np.delete(self._aspects, index)
+        self._tiles = np.delete(self._tiles, index, axis=0)
+        self._vectors = np.delete(self._vectors, index, axis=0)
+
+    def add_catalog(self):
+        """Seed the library with rendered catalog labels"""
+        with self._lock:
+            for label in catalog_labels():
+                img = render_text(label)
+                self._append(label, make_tile(img), img.shape[1] / img.shape[0], "catalog")
+
+    def add_sample(self, label, crop):
+        """Learn a crop the recognizer read confidently. Returns True if stored."""
+        h, w = crop.shape[:2]
+        if h < 4 or w < 4 or is_count_label(label):
+            return False
+        with self._lock:
+            same = [i for i, (l, s) in enumerate(zip(self._labels, self._sources))
+                    if l == label and s == "sample"]
+            if len(same) >= MAX_SAMPLES_PER_LABEL:
+                return False
+            if len(self._labels) >= MAX_TEMPLATES:
+                samples = [i for i, s in enumerate(self._sources) if s == "sample"]
+                if not samples:
+                    return False
+                self._remove(samples[0])  # drop the oldest sample
+            added = self._append(label, make_tile(crop), w / h, "sample")
+            self.dirty = self.dirty or added
+            return added
+
+    def match(self, crop):
+        """Best label for a crop.
+
+        Returns:
+            tuple: (label, score) - label is None when the match isn't confident
+        """
+        h, w = crop.shape[:2]
+        if h < 4 or w < 4 or not self._labels:
+            self.misses += 1
+            return None, 0.0
+
+        vector, valid = _normalize(make_tile(crop)[None])
+        with self._lock:
+            aspect = w / h
+            candidates = np.abs(self._aspects - aspect) <= ASPECT_TOLERANCE * aspect
+            if not valid[0] or not candidates.any():
+                self.misses += 1
+                return None, 0.0
+
+            # Polarity-insensitive NCC against every compatible template at once
+            scores = np.abs(self._vectors @ vector[0])
+            scores[~candidates] = -1.0
+            best = int(scores.argmax())
+            label = self._labels[best]
+            score = float(scores[best])
+            others = scores[(self._label_array != label) & candidates]
+
+        runner_up = float(others.max()) if others.size else 0.0
+        if score >= self.threshold and score - runner_up >= MATCH_MARGIN:
+            self.hits += 1
+            return label, score
+        self.misses += 1
+        return None, score
+
+    def save(self, path=TEMPLATES_FILE):
+        """Persist learned samples (catalog tiles are rebuilt on load)"""
+        with self._lock:
+            keep = [i for i, s in enumerate(self._sources) if s == "sample"]
+            labels = np.array([self._labels[i] for i in keep])
+            tiles = self._tiles[keep]
+            aspects = self._aspects[keep]
+            self.dirty = False
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            with open(path, "wb") as f:
+                np.savez_compressed(f, labels=labels, tiles=tiles, aspects=aspects)
+        except Exception as e:
+            log.error("Save error: %s", e)
+
+    def load(self, path=TEMPLATES_FILE):
+        """Load learned samples saved by save()"""
+        try:
+            if not path.exists():
+                return
+            data = np.load(path)
+            with self._lock:
+                for label, tile, aspect in zip(data["labels"], data["tiles"], data["aspects"]):
+                    # Count samples saved by older versions are dropped
+                    if tile.shape == (TILE_SIZE[1], TILE_SIZE[0]) and not is_count_label(str(label)):
+                        self._append(str(label), tile, float(aspect), "sample")
+        except Exception as e:
+            log.error("Load error: %s", e)
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {
+            "templates": len(self._labels),
+            "samples": self._sources.count("sample"),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0,
+        }
@@ -0,0 +1,54 @@
+import random
+
+import numpy as np
+from PIL import Image
+
+import synth
+from locator import ForgeLocator, TemplateMatcher, to_grey
+
+
+def forge_template(seed=1):
+    slots = synth.random_composition(random.Random(seed))
+    frame, _, _ = synth.render_frame(slots, random.Random(seed))
+    return frame
+
+
+def noise_screen(seed=0, size=(1080, 1920)):
+    return np.random.default_rng(seed).integers(0, 256, (*size, 3)).astype(np.uint8)
+
+
+def trained_locator(template):
+    locator = ForgeLocator()
+    locator.template = to_grey(template)
+    locator.rect = {"x": 0, "y": 0, "width": template.shape[1], "height": template.shape[0]}
+    return locator
+
+
+def test_search_finds_template_at_known_position_and_scale():
+    template = forge_template()
+    th, tw = template.shape[:2]
+    for scale, (x, y) in ((1.0, (300, 200)), (1.3, (850, 640)), (0.8, (40, 900))):
+        sw, sh = round(tw * scale), round(th * scale)
+        screen = noise_screen()
+        screen[y:y + sh, x:x + sw] = np.asarray(Image.fromarray(template).resize((sw, sh), Image.BILINEAR))
+        region, score = trained_locator(template).search(screen, origin=(1920, 0))
+        assert region is not None, (scale, score)
+        assert abs(region["x"] - 1920 - x) <= 2 and abs(region["y"] - y) <= 2, (scale, region)
+        assert abs(region["width"] / sw - 1) < 0.05 and abs(region["height"] / sh - 1) < 0.05, (scale, region)
+        assert -1.0 <= score <= 1.0
+
+
+def test_search_rejects_screens_without_the_template():
+    template = forge_template()
+    for screen in (np.full((1080, 1920, 3), 60, np.uint8), noise_screen(seed=3)):
+        region, score = trained_locator(template).search(screen)
+        assert region is None
+        assert score <= 1.0
+
+
+def test_flat_windows_score_zero():
+    image = np.full((60, 80), 60, np.float32)
+    image[:, 40:] += np.linspace(0, 1e-5, 40, dtype=np.float32)  # float noise, no real contrast
+    templ = np.random.default_rng(0).random((10, 10)).astype(np.float32) * 255
+    scores = TemplateMatcher(image, templ.shape).match(templ)
+    assert np.all(scores == 0.0)
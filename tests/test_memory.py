@@ -0,0 +1,56 @@
+import pytest
+
+import memory
+from memory import MIN_IDLE, ReaderMemoryManager
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(memory.time, "monotonic", lambda: now[0])
+    return now
+
+
+def test_unloads_after_idle_period(clock):
+    manager = ReaderMemoryManager(unload_after=300, memory_budget_mb=0)
+    clock[0] += 299
+    assert not manager.should_unload()
+    clock[0] += 1
+    assert manager.should_unload()
+
+
+def test_forge_sighting_resets_idle_time(clock):
+    manager = ReaderMemoryManager(unload_after=300)
+    clock[0] += 250
+    manager.note_forge(True)
+    clock[0] += 100
+    assert not manager.should_unload()
+    manager.note_forge(False)  # a closed forge doesn't reset it
+    clock[0] += 200
+    assert manager.should_unload()
+
+
+def test_zero_unload_after_never_unloads_on_time(clock):
+    manager = ReaderMemoryManager(unload_after=0)
+    clock[0] += 10 ** 6
+    assert not manager.should_unload()
+    assert not manager.should_unload(total_mb=10 ** 6)  # no budget either
+
+
+def test_memory_budget_needs_minimum_idle(clock):
+    manager = ReaderMemoryManager(unload_after=0, memory_budget_mb=500)
+    assert not manager.should_unload(total_mb=800)  # forge just seen
+    clock[0] += MIN_IDLE
+    assert manager.should_unload(total_mb=800)
+    assert not manager.should_unload(total_mb=400)
+    assert not manager.should_unload(total_mb=None)  # memory unknown
+
+
+def test_reload_starts_a_fresh_idle_period(clock):
+    manager = ReaderMemoryManager(unload_after=300)
+    clock[0] += 400
+    assert manager.should_unload()
+    manager.record_unload()
+    manager.record_reload()
+    assert not manager.should_unload()
+    assert manager.stats()["unloads"] == 1 and manager.stats()["reloads"] == 1
@@ -0,0 +1,45 @@
+import threading
+
+import ocr_scanner
+
+
+class FailingWorker:
+    attempts = 0
+
+    def __init__(self, settings):
+        pass
+
+    def start(self):
+        FailingWorker.attempts += 1
+        raise RuntimeError("no network")
+
+
+def test_load_failure_calls_on_error_and_can_retry(monkeypatch):
+    monkeypatch.setattr(ocr_scanner, "OCRWorker", FailingWorker)
+    monkeypatch.setattr(ocr_scanner, "get_ocr_settings", lambda: {"worker_process": True})
+    ready, errors = [], []
+    failed = threading.Semaphore(0)
+
+    def on_error(message):
+        errors.append(message)
+        failed.release()
+
+    for attempt in (1, 2):
+        ocr_scanner.load_reader_async(on_ready=lambda: ready.append(True), on_error=on_error)
+        assert failed.acquire(timeout=5)
+        assert FailingWorker.attempts == attempt
+    assert errors == ["no network", "no network"]
+    assert not ready
+    assert not ocr_scanner.is_reader_ready()
+
+
+def test_ocr_frame_skips_ocr_while_unloaded(monkeypatch):
+    import numpy as np
+
+    def no_reader():
+        raise AssertionError("ocr_frame loaded the model")
+
+    monkeypatch.setattr(ocr_scanner, "reader_unloaded", True)
+    monkeypatch.setattr(ocr_scanner, "get_reader", no_reader)
+    results, frame_changed, _ = ocr_scanner.ocr_frame(np.zeros((20, 40, 3), np.uint8))
+    assert results is None and not frame_changed
@@ -0,0 +1,48 @@
+import queue
+from multiprocessing import shared_memory
+
+import numpy as np
+
+import ocr_backend
+import ocr_worker
+
+
+class FakeReader:
+    def readtext(self, img):
+        return int(img.sum())
+
+
+def test_worker_keeps_only_the_current_shared_block(monkeypatch):
+    monkeypatch.setattr(ocr_backend, "resolve_backend", lambda settings: {"device": "cpu"})
+    monkeypatch.setattr(ocr_backend, "create_reader", lambda backend: FakeReader())
+    monkeypatch.setattr(ocr_backend, "warm_up", lambda reader: None)
+    attached = []
+    real_attach = ocr_worker._attach
+
+    def attach(name):
+        block = real_attach(name)
+        attached.append(block)
+        return block
+
+    monkeypatch.setattr(ocr_worker, "_attach", attach)
+
+    requests, results = queue.Queue(), queue.Queue()
+    owned = []
+    for i, size in enumerate((4, 4, 8)):
+        if i == 0 or size > owned[-1].size:  # the parent only replaces its block to grow it
+            owned.append(shared_memory.SharedMemory(create=True, size=size))
+        np.ndarray((size,), np.uint8, buffer=owned[-1].buf)[:] = 1
+        requests.put((i, "readtext", owned[-1].name, (size,), "uint8", {}))
+    requests.put(None)
+    try:
+        ocr_worker._worker_main({}, requests, results)
+        replies = [results.get_nowait() for _ in range(4)]
+        assert replies[0][0] == "ready"
+        assert [r[2] for r in replies[1:]] == [4, 4, 8]
+        # One attach per block; the first was closed as soon as the second arrived
+        assert [b.name for b in attached] == [b.name for b in owned]
+        assert all(b.buf is None for b in attached)
+    finally:
+        for block in owned:
+            block.close()
+            block.unlink()
@@ -0,0 +1,55 @@
+import threading
+import time
+
+from pipeline import ScanPipeline
+
+
+def test_drain_waits_for_frames_in_flight():
+    release = threading.Event()
+    sunk = []
+
+    def slow(packet):
+        release.wait(2.0)
+        return packet
+
+    pipeline = ScanPipeline([("slow", slow), ("pass", lambda p: p)], sunk.append)
+    pipeline.start()
+    try:
+        pipeline.submit({"frame": 1})
+        time.sleep(0.05)  # picked up by the slow stage
+        pipeline.submit({"frame": 2})  # waits behind it
+        pipeline.submit({"frame": 3})  # supersedes frame 2
+        assert not pipeline.drain(0.1)
+        release.set()
+        assert pipeline.drain(2.0)
+        # Frame 1 may be superseded by 3 on the way too - only the newest is certain
+        assert sunk[-1]["frame"] == 3 and 2 not in [p["frame"] for p in sunk]
+    finally:
+        pipeline.stop()
+
+
+def test_drain_counts_frames_a_stage_stops():
+    pipeline = ScanPipeline([("drop", lambda p: None), ("never", lambda p: p)], lambda p: None)
+    pipeline.start()
+    try:
+        for i in range(5):
+            pipeline.submit({"frame": i})
+        assert pipeline.drain(2.0)
+    finally:
+        pipeline.stop()
+
+
+def test_submit_keeps_the_callers_capture_time():
+    sunk = []
+    pipeline = ScanPipeline([("pass", lambda p: p)], sunk.append)
+    pipeline.start()
+    try:
+        before = time.perf_counter()
+        pipeline.submit({"frame": 1, "captured_at": 12.5})
+        assert pipeline.drain(2.0)
+        pipeline.submit({"frame": 2})
+        assert pipeline.drain(2.0)
+        assert sunk[0]["captured_at"] == 12.5
+        assert sunk[1]["captured_at"] >= before
+    finally:
+        pipeline.stop()
@@ -0,0 +1,27 @@
+import numpy as np
+
+from preprocess import PRESETS, preprocess, to_grayscale
+
+
+def test_grayscale_keeps_grey_levels():
+    for level in (0, 1, 128, 200, 255):
+        img = np.full((4, 6, 3), level, dtype=np.uint8)
+        grey = to_grayscale(img)
+        assert grey.dtype == np.uint8
+        assert grey.shape == (4, 6)
+        # The x256 weights sum to 256, so a grey pixel maps to itself
+        assert (grey == level).all()
+
+
+def test_grayscale_bt601_weights():
+    img = np.array([[[255, 0, 0], [0, 255, 0], [0, 0, 255], [200, 150, 100]]], dtype=np.uint8)
+    expected = (img.astype(np.uint32) @ np.array([77, 150, 29], dtype=np.uint32)) >> 8
+    assert to_grayscale(img).tolist() == expected.tolist()
+
+
+def test_grey_presets_are_not_black():
+    img = np.full((40, 80, 3), 40, dtype=np.uint8)
+    img[10:30, 20:60] = 200
+    for name in ("grey", "fast", "binary"):
+        out, _ = preprocess(img, PRESETS[name])
+        assert out.max() > 0, name
@@ -0,0 +1,158 @@
+import threading
+import time
+
+import numpy as np
+import pytest
+
+from window_state import BACKGROUND, MINIMIZED, MISSING, VISIBLE, StubWindowState
+
+
+def wait_until(condition, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > deadline:
+            return False
+        time.sleep(0.01)
+    return True
+
+
+def wait_still(counter, settle=0.1, timeout=2.0):
+    """Wait until counter() stops changing for settle seconds"""
+    deadline = time.monotonic() + timeout
+    last = counter()
+    while time.monotonic() < deadline:
+        time.sleep(settle)
+        current = counter()
+        if current == last:
+            return True
+        last = current
+    return False
+
+
+def test_stub_reports_the_state_it_was_set_to():
+    stub = StubWindowState()
+    assert stub.is_visible()
+    for state in (BACKGROUND, MINIMIZED, MISSING):
+        stub.set(state)
+        assert stub.state() == state
+        assert not stub.is_visible()
+        assert not stub.wait_visible(0.01)
+
+
+def test_stub_wait_visible_wakes_on_set():
+    stub = StubWindowState(MINIMIZED)
+    threading.Timer(0.05, stub.set, (VISIBLE,)).start()
+    start = time.monotonic()
+    assert stub.wait_visible(2.0)
+    assert time.monotonic() - start < 1.0
+
+
+class FakeSource:
+    def __init__(self):
+        self.grabs = 0
+
+    def grab(self, region=None):
+        self.grabs += 1
+        return np.zeros((20, 40, 3), dtype=np.uint8)
+
+
+class FakePipeline:
+    def __init__(self):
+        self.packets = 0
+
+    def start(self):
+        pass
+
+    def submit(self, packet):
+        self.packets += 1
+
+
+class FakeScheduler:
+    def wait(self, timeout=None):
+        time.sleep(0.005)
+
+    def wake(self):
+        pass
+
+
+class FakeMemory:
+    memory_budget_mb = 0
+
+    def should_unload(self, total_mb):
+        return False
+
+
+class FakeRoot:
+    def after(self, delay, func):
+        func()
+
+
+class FakeLabel:
+    text = None
+
+    def config(self, text):
+        self.text = text
+
+
+def make_app(window_state):
+    """Just enough of ForgerCompanion to run its auto-detect loop headless"""
+    from app import ForgerCompanion
+
+    class App:
+        start_auto_detect = ForgerCompanion.start_auto_detect
+        on_game_state = ForgerCompanion.on_game_state
+
+        def on_scan_error(self, stage, packet, error):
+            raise error
+
+    app = App()
+    app.window_state = window_state
+    app.auto_mode = True
+    app.auto_thread = None
+    app.game_state = VISIBLE
+    app.model_unloaded = False
+    app.locator = None
+    app.scan_region = {"x": 0, "y": 0, "width": 40, "height": 20}
+    app.capture_session = FakeSource()
+    app.scan_pipeline = FakePipeline()
+    app.scheduler = FakeScheduler()
+    app.memory = FakeMemory()
+    app.root = FakeRoot()
+    app.status_label = FakeLabel()
+    return app
+
+
+def test_auto_detect_loop_pauses_while_hidden():
+    pytest.importorskip("tkinter")  # app.py imports it at module level
+    import ocr_scanner
+
+    ocr_scanner.reader_ready.set()  # no model needed: frames go to the fake pipeline
+    stub = StubWindowState(VISIBLE)
+    app = make_app(stub)
+    source, pipeline = app.capture_session, app.scan_pipeline
+    app.start_auto_detect()
+    try:
+        assert wait_until(lambda: pipeline.packets >= 3)
+
+        statuses = {BACKGROUND: "Paused - Roblox not in focus",
+                    MINIMIZED: "Paused - Roblox not in focus",
+                    MISSING: "Paused - Roblox window not found"}
+        for hidden, status in statuses.items():
+            stub.set(hidden)
+            assert wait_until(lambda: app.game_state == hidden)
+            assert app.status_label.text.startswith(status)
+            # A tick that was already capturing may still finish; then nothing more
+            assert wait_still(lambda: (source.grabs, pipeline.packets))
+            grabs, packets = source.grabs, pipeline.packets
+            time.sleep(0.2)
+            assert (source.grabs, pipeline.packets) == (grabs, packets)
+
+            stub.set(VISIBLE)
+            assert wait_until(lambda: pipeline.packets > packets + 2)
+            assert app.game_state == VISIBLE
+            assert app.status_label.text == "Waiting for Forge UI..."
+    finally:
+        app.auto_mode = False
+        stub.set(VISIBLE)
+        app.auto_thread.join(2.0)
+        ocr_scanner.reader_ready.clear()
@@ -0,0 +1,201 @@
+"""Pixel-signature Forge UI detector (OCR-free open/closed check)
+
+Looking for "Empty" / "Forge Chances" / "Multiplier" with OCR costs a full
+readtext per tick. Instead, the first time OCR confirms the forge UI is open
+in a region, a handful of anchor patches of that frame - the UI chrome away
+from any text - are remembered as a coarse colour histogram plus a small
+grey template each. Later frames are checked by sampling just those patches
+(a few hundred pixels in total): if enough anchors still match, the UI is
+open and OCR runs; otherwise OCR is skipped.
+
+The reference is dropped and relearned when OCR keeps contradicting it, and
+OCR only ever gets skipped while the last OCR also saw the UI closed - once
+it is open, every scan reads the slots (the frame, layout and tile caches
+keep that cheap) - and it still runs every VERIFY_INTERVAL seconds while
+"closed" as a safety net.
+"""
+
+import threading
+import time
+
+import numpy as np
+
+PATCH_GRID = (8, 4)        # (cols, rows) of candidate anchor patches over the region
+PATCH_SAMPLES = 12         # samples per patch side (a 12x12 point grid)
+MAX_ANCHORS = 16
+HIST_LEVELS = 4            # per channel -> 64 colour bins
+HIST_SHIFT = 6             # uint8 >> 6 = 4 levels
+HIST_MIN_OVERLAP = 0.7     # histogram intersection an anchor needs
+NCC_MIN = 0.8              # template correlation an anchor needs (textured patches)
+FLAT_STD = 4.0             # patches with less grey std than this are compared by mean
+FLAT_MAX_DIFF = 12.0       # max mean grey difference for flat patches
+MIN_MATCH_FRACTION = 0.75  # anchors that must match for "open"
+VERIFY_INTERVAL = 30.0     # s between safety-net OCR runs while "closed"
+MAX_FALSE_OPENS = 3        # OCR disagreements before the reference is relearned
+
+
+def _sample_grid(rects):
+    """Row/col sample indices (A, PATCH_SAMPLES) for (x0, y0, x1, y1) rects"""
+    rects = np.asarray(rects, dtype=np.float64)
+    steps = np.linspace(0.0, 1.0, PATCH_SAMPLES)
+    xs = rects[:, 0, None] + (rects[:, 2, None] - 1 - rects[:, 0, None]) * steps
+    ys = rects[:, 1, None] + (rects[:, 3, None] - 1 - rects[:, 1, None]) * steps
+    return ys.astype(np.intp), xs.astype(np.intp)
+
+
+def patch_features(img, ys, xs):
+    """Colour histograms and grey templates of the sampled patches.
+
+    Returns:
+        tuple: (hists (A, 64) float32 summing to 1, grey (A, S*S) float32)
+    """
+    patches = img[ys[:, :, None], xs[:, None, :]]  # (A, S, S, 3)
+    count = len(ys)
+    if patches.ndim == 3:  # grey capture
+        patches = np.repeat(patches[..., None], 3, axis=3)
+    q = patches >> HIST_SHIFT
+    codes = (q[..., 0].astype(np.intp) * HIST_LEVELS + q[..., 1]) * HIST_LEVELS + q[..., 2]
+    bins = HIST_LEVELS ** 3
+    codes = codes.reshape(count, -1) + np.arange(count)[:, None] * bins
+    hists = np.bincount(codes.ravel(), minlength=count * bins).reshape(count, bins)
+    hists = hists.astype(np.float32) / (PATCH_SAMPLES * PATCH_SAMPLES)
+    grey = patches.reshape(count, -1, 3).mean(axis=2, dtype=np.float32)
+    return hists, grey
+
+
+def _rects_overlap(rect, boxes):
+    x0, y0, x1, y1 = rect
+    return any(bx0 < x1 and bx1 > x0 and by0 < y1 and by1 > y0 for bx0, by0, bx1, by1 in boxes)
+
+
+class ForgeUIDetector:
+    """Per-region anchor references learned from OCR-confirmed frames"""
+
+    def __init__(self, verify_interval=VERIFY_INTERVAL):
+        self.verify_interval = verify_interval
+        self.checks = 0
+        self.skips = 0
+        self.check_time = 0.0
+        self.relearns = 0
+        self._refs = {}      # region key -> reference dict
+        self._last_ocr = {}  # region key -> time OCR last ran
+        self._open = {}      # region key -> what the last OCR said
+        self._lock = threading.Lock()
+
+    def learn(self, key, img, text_boxes):
+        """Remember anchors of a frame OCR says shows the forge UI.
+
+        text_boxes are (x_min, y_min, x_max, y_max) rects of the OCR'd text;
+        patches touching them are skipped since their content changes.
+        """
+        h, w = img.shape[:2]
+        cols, rows = PATCH_GRID
+        if w < cols * 4 or h < rows * 4:
+            return False
+        margin = 2  # stay clear of text anti-aliasing around the boxes
+        boxes = [(x0 - margin, y0 - margin, x1 + margin, y1 + margin) for x0, y0, x1, y1 in text_boxes]
+        rects = []
+        for r in range(rows):
+            for c in range(cols):
+                rect = (c * w // cols, r * h // rows, (c + 1) * w // cols, (r + 1) * h // rows)
+                if not _rects_overlap(rect, boxes):
+                    rects.append(rect)
+        if len(rects) < 4:
+            return False  # text everywhere - nothing stable to anchor on
+
+        ys, xs = _sample_grid(rects)
+        hists, grey = patch_features(img, ys, xs)
+        # Prefer textured patches (borders, icons): they make the best templates
+        order = np.argsort(-grey.std(axis=1))[:MAX_ANCHORS]
+        ys, xs, hists, grey = ys[order], xs[order], hists[order], grey[order]
+        with self._lock:
+            self._refs[key] = {
+                "shape": img.shape,
+                "ys": ys,
+                "xs": xs,
+                "hists": hists,
+                "grey": grey,
+                "textured": grey.std(axis=1) >= FLAT_STD,
+                "false_opens": 0,
+            }
+        return True
+
+    def check(self, key, img):
+        """Is the forge UI open in this frame?
+
+        Returns:
+            bool or None: None when the region has no reference yet
+        """
+        start = time.perf_counter()
+        with self._lock:
+            ref = self._refs.get(key)
+        if ref is None or ref["shape"] != img.shape:
+            return None
+
+        hists, grey = patch_features(img, ref["ys"], ref["xs"])
+        hist_ok = np.minimum(hists, ref["hists"]).sum(axis=1) >= HIST_MIN_OVERLAP
+
+        a = grey - grey.mean(axis=1, keepdims=True)
+        b = ref["grey"] - ref["grey"].mean(axis=1, keepdims=True)
+        denom = np.sqrt((a * a).sum(axis=1) * (b * b).sum(axis=1))
+        ncc = (a * b).sum(axis=1) / np.maximum(denom, 1e-6)
+        mean_diff = np.abs(grey.mean(axis=1) - ref["grey"].mean(axis=1))
+        template_ok = np.where(ref["textured"], ncc >= NCC_MIN, mean_diff <= FLAT_MAX_DIFF)
+
+        is_open = float(np.mean(hist_ok & template_ok)) >= MIN_MATCH_FRACTION
+        self.checks += 1
+        self.check_time += time.perf_counter() - start
+        return is_open
+
+    def should_ocr(self, key, img):
+        """True unless the UI was closed and the detector says it still is.
+
+        Returns:
+            tuple: (run_ocr, verdict) - verdict is check()'s answer
+        """
+        verdict = self.check(key, img)
+        now = time.monotonic()
+        if (verdict is False and self._open.get(key) is False
+                and now - self._last_ocr.get(key, 0.0) < self.verify_interval):
+            self.skips += 1
+            return False, verdict
+        self._last_ocr[key] = now
+        return True, verdict
+
+    def update(self, key, img, verdict, is_forge_ui, text_boxes):
+        """Reconcile the detector with what OCR found on the same frame"""
+        self._open[key] = is_forge_ui
+        if is_forge_ui:
+            if verdict is not True:
+                # Untrained, or a missed open (safety-net OCR): (re)learn from this frame
+                if verdict is False:
+                    self.relearns += 1
+                self.learn(key, img, text_boxes)
+            else:
+                with self._lock:
+                    ref = self._refs.get(key)
+                    if ref:
+                        ref["false_opens"] = 0
+        elif verdict:
+            with self._lock:
+                ref = self._refs.get(key)
+                if ref:
+                    ref["false_opens"] += 1
+                    if ref["false_opens"] >= MAX_FALSE_OPENS:
+                        del self._refs[key]  # stale reference: wait for OCR to see the UI again
+                        self.relearns += 1
+
+    def reset(self):
+        with self._lock:
+            self._refs.clear()
+            self._last_ocr.clear()
+            self._open.clear()
+
+    def stats(self):
+        return {
+            "trained": len(self._refs),
+            "checks": self.checks,
+            "skips": self.skips,
+            "relearns": self.relearns,
+            "avg_us": self.check_time * 1e6 / self.checks if self.checks else 0.0,
+        }
@@ -0,0 +1,125 @@
+"""Is the game on screen? Lets the scan loop sleep while Roblox is hidden
+
+A WindowStateProvider reports one of:
+    VISIBLE     Roblox is the foreground window (or the overlay itself is)
+    BACKGROUND  another application has the focus
+    MINIMIZED   Roblox is minimized
+    MISSING     no Roblox window
+
+Only VISIBLE counts as visible: capturing a window that is covered or
+minimized just reads other apps' pixels. wait_visible() polls every
+POLL_INTERVAL, so work resumes within that long of the game coming back.
+
+Win32WindowState finds the game through macro.find_roblox_window (imported
+lazily - macro needs the Windows API). StubWindowState always reports the
+state it was given; it's the provider on other platforms and in tests.
+"""
+
+import os
+import sys
+import threading
+import time
+
+from log import get_logger
+
+log = get_logger("window")
+
+VISIBLE = "visible"
+BACKGROUND = "background"
+MINIMIZED = "minimized"
+MISSING = "missing"
+
+POLL_INTERVAL = 0.1  # s between checks while waiting for the game to come back
+
+
+class WindowStateProvider:
+    """Reports whether the game window can currently be captured"""
+
+    def state(self):
+        raise NotImplementedError
+
+    def is_visible(self):
+        return self.state() == VISIBLE
+
+    def wait_visible(self, timeout):
+        """Block until the game is visible or timeout passes.
+
+        Returns:
+            bool: True if the game is visible
+        """
+        deadline = time.monotonic() + timeout
+        while not self.is_visible():
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return False
+            time.sleep(min(POLL_INTERVAL, remaining))
+        return True
+
+
+class StubWindowState(WindowStateProvider):
+    """Reports a fixed state, changeable with set() (non-Windows platforms, tests)"""
+
+    def __init__(self, state=VISIBLE):
+        self._state = state
+        self._changed = threading.Condition()
+
+    def set(self, state):
+        with self._changed:
+            self._state = state
+            self._changed.notify_all()
+
+    def state(self):
+        return self._state
+
+    def wait_visible(self, timeout):
+        with self._changed:
+            return self._changed.wait_for(lambda: self._state == VISIBLE, timeout)
+
+
+class Win32WindowState(WindowStateProvider):
+    """Roblox window state through the Win32 API"""
+
+    def __init__(self):
+        import ctypes
+        from ctypes import wintypes
+        from macro import find_roblox_window, user32
+        self._ctypes = ctypes
+        self._wintypes = wintypes
+        self._user32 = user32
+        self._find = find_roblox_window
+        self._hwnd = None
+        self._pid = os.getpid()
+
+    def _window(self):
+        # FindWindow is cheap, but the handle stays valid until the game closes
+        if not self._hwnd or not self._user32.IsWindow(self._hwnd):
+            self._hwnd = self._find() or None
+        return self._hwnd
+
+    def _is_own_window(self, hwnd):
+        pid = self._wintypes.DWORD()
+        self._user32.GetWindowThreadProcessId(hwnd, self._ctypes.byref(pid))
+        return pid.value == self._pid
+
+    def state(self):
+        hwnd = self._window()
+        if not hwnd:
+            return MISSING
+        if self._user32.IsIconic(hwnd):
+            return MINIMIZED
+        foreground = self._user32.GetForegroundWindow()
+        # Clicking the overlay makes it the foreground window; the game is still on screen
+        if foreground == hwnd or (foreground and self._is_own_window(foreground)):
+            return VISIBLE
+        return BACKGROUND
+
+
+def create_window_state(capture_settings):
+    """Provider for the "capture" settings: Win32 when live on Windows, else a stub"""
+    live = capture_settings.get("source") in (None, "", "screen")
+    if sys.platform == "win32" and live and capture_settings.get("pause_when_hidden", True):
+        try:
+            return Win32WindowState()
+        except Exception as e:
+            log.warning("Can't track the game window (%s) - scanning even when it's hidden", e)
+    return StubWindowState(VISIBLE)